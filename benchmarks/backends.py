@@ -0,0 +1,63 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+""" Compiles examples with the class file and the Jasmin backends, checks that programs behave the same and
+compares compile time (Jasmin backend starts one more JVM for every compile).
+
+Compiler must be built first (rebuild.bat), java must be in PATH.
+"""
+
+import os
+import sys
+import glob
+import time
+import argparse
+import tempfile
+
+from common import BENCHMARK_DIR, compile_source, make_list_input, run_jar
+
+
+EXAMPLES_DIR = os.path.join(os.path.dirname(BENCHMARK_DIR), 'examples')
+
+BACKENDS = ['classfile', 'jasmin']
+
+
+def main():
+    args_parser = argparse.ArgumentParser(description='Compiler backends equivalence check.')
+    args_parser.add_argument('--compiler-dir', default='build', help='directory with built listlang.py')
+    args_parser.add_argument('--examples-dir', default=EXAMPLES_DIR)
+    args = args_parser.parse_args()
+
+    build_dir = tempfile.mkdtemp()
+    input_data = make_list_input(10) + make_list_input(7)
+    failed = []
+
+    print '%-28s %14s %14s %8s' % ('example', 'classfile, s', 'jasmin, s', 'result')
+    for src_filename in sorted(glob.glob(os.path.join(args.examples_dir, '*.ll'))):
+        name = os.path.basename(src_filename)
+        if name.startswith('error_'):
+            continue
+
+        compile_times = []
+        outputs = []
+        for backend in BACKENDS:
+            jar_filename = os.path.join(build_dir, '%s_%s.jar' % (name, backend))
+            start = time.time()
+            compile_source(os.path.abspath(args.compiler_dir), os.path.abspath(src_filename), jar_filename,
+                           ['--backend', backend])
+            compile_times.append(time.time() - start)
+            try:
+                outputs.append(run_jar(jar_filename, input_data)[1])
+            except RuntimeError as e:
+                outputs.append(str(e))
+
+        result = 'ok' if outputs[0] == outputs[1] else 'differs'
+        if result != 'ok':
+            failed.append(name)
+        print '%-28s %14.3f %14.3f %8s' % (name, compile_times[0], compile_times[1], result)
+
+    if failed:
+        sys.exit('backends differ on: %s' % ', '.join(failed))
+
+
+if __name__ == "__main__":
+    main()
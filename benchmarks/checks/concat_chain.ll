@@ -0,0 +1,24 @@
+// Chains of concatenations: right operand changes a list which is an operand of the left concatenation
+a = [1]
+b = [2]
+
+x = a + b + (a + 3)
+print x, a
+
+y = a + b + (a++)
+print y, a
+
+g = [5]
+
+define h() {
+	global g
+	k = g++
+	return [7]
+}
+
+z = g + b + h()
+print z, g
+
+// nothing is changed, the chain is made by one concatenation
+w = a + [4] + b + a
+print w
@@ -0,0 +1,11 @@
+// Parameter aliases global list which is mutated by the function, parameter must be cloned on call
+g = [1, 2]
+
+define f(List l) {
+	global g
+	h = g++
+	print l
+	return 0
+}
+
+x = f(g)
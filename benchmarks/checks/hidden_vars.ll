@@ -0,0 +1,18 @@
+// Sibling loops over slices and concatenations take hidden variables freed by code made before them
+define f(List l) {
+	s = 0
+	for x in l[1:3] {
+		s = s + x
+	}
+	m = [s] + l + [s]
+	for x in m[0:2] {
+		for y in l[2:4] {
+			s = s + x * y
+		}
+	}
+	n = [s] + m + [0] + l
+	print s, m, n
+	return 0
+}
+
+r = f([1, 2, 3, 4])
@@ -0,0 +1,35 @@
+// List * n and List / x: times <= 1, empty lists, removing of every element
+l = [1, 2, 3]
+e = []
+
+print l * 0
+print l * (0 - 2)
+print l * 1
+print l * 3
+print e * 0
+print e * 5
+print len([1, 2] * 1000)
+
+// times <= 1 gives the list itself, not a copy
+m = l * 1
+k = m++
+print l
+
+define f(List p) {
+	m = p * 1
+	k = m++
+	return len(p)
+}
+
+print f(l), l
+
+print [1, 2, 1, 3, 1] / 1
+print [5, 5, 5] / 5
+print e / 1
+print [1, 2] / 7
+print len(([1, 2] * 1000) / 1)
+
+// removing makes new list
+r = l / 9
+k = r++
+print l
@@ -0,0 +1,3 @@
+// List * n over maximum list size (2^30) fails instead of hanging in capacity doubling
+l = [1, 2, 3] * 400000000
+print len(l)
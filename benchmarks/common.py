@@ -0,0 +1,77 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+""" Helpers for benchmarks of compiled ListLang programs """
+
+import os
+import sys
+import time
+import tempfile
+import subprocess
+
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def compile_source(compiler_dir, src_filename, jar_filename, compiler_args=(), quiet=False):
+    """ Compiles ListLang source with listlang.py from compiler_dir (build directory made by rebuild.bat),
+    quiet - hide progress messages of compiler """
+    with open(os.devnull, 'w') as devnull:
+        subprocess.check_call(
+            [sys.executable, 'listlang.py', src_filename, jar_filename] + list(compiler_args), cwd=compiler_dir,
+            stdout=devnull if quiet else None
+        )
+
+
+def make_list_input(size):
+    return '[%s]\n' % ', '.join(str(i % 100) for i in xrange(size))
+
+
+def run_jar(jar_filename, input_data, java_args=()):
+    """ Runs compiled program, returns (wall_time, stdout, stderr) """
+    start = time.time()
+    process = subprocess.Popen(
+        ['java'] + list(java_args) + ['-jar', jar_filename],
+        stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.PIPE
+    )
+    stdout, stderr = process.communicate(input_data)
+    elapsed = time.time() - start
+    if process.returncode != 0:
+        raise RuntimeError('benchmark program failed with code %i:\n%s' % (process.returncode, stderr))
+    return elapsed, stdout, stderr
+
+
+def best_run(jar_filename, input_data, repeat, java_args=()):
+    """ Returns best wall time of repeat runs """
+    return min(run_jar(jar_filename, input_data, java_args)[0] for _ in xrange(repeat))
+
+
+def run_jar_measured(jar_filename, input_data, java_args=()):
+    """ Runs compiled program with input and output in temporary files, so writing of input is not timed,
+    returns (wall_time, stdout, peak_rss_kb), peak memory is known only on Unix, else it is None """
+    with tempfile.TemporaryFile() as stdin_file, tempfile.TemporaryFile() as stdout_file, \
+            tempfile.TemporaryFile() as stderr_file:
+        stdin_file.write(input_data)
+        stdin_file.seek(0)
+
+        start = time.time()
+        process = subprocess.Popen(
+            ['java'] + list(java_args) + ['-jar', jar_filename],
+            stdin=stdin_file, stdout=stdout_file, stderr=stderr_file
+        )
+        peak_rss_kb = None
+        if hasattr(os, 'wait4'):
+            pid, status, rusage = os.wait4(process.pid, 0)
+            elapsed = time.time() - start
+            process.returncode = os.WEXITSTATUS(status) if os.WIFEXITED(status) else -os.WTERMSIG(status)
+            peak_rss_kb = rusage.ru_maxrss
+            if sys.platform == 'darwin':
+                peak_rss_kb //= 1024    # bytes on Mac OS
+        else:
+            process.wait()
+            elapsed = time.time() - start
+
+        stdout_file.seek(0)
+        stderr_file.seek(0)
+        if process.returncode != 0:
+            raise RuntimeError('benchmark program failed with code %i:\n%s' % (process.returncode, stderr_file.read()))
+        return elapsed, stdout_file.read(), peak_rss_kb
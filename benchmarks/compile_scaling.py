@@ -0,0 +1,132 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+""" Measures how compile time and memory grow with size of generated programs (see program_generator.py).
+
+Every program is compiled by listlang.py with --profile-json, time is the sum of compile phases (without start
+of interpreter), memory is peak RSS above peak RSS of compiling a trivial program. Growth exponent is the slope
+of log(time) over log(number of tokens), fitted over all sizes of dimension. Benchmark fails if any exponent
+is over --max-exponent, that is compile time or memory grows superlinearly.
+
+Deep nesting (blocks, functions, long expressions) is limited by Python recursion limit of ANTLR runtime,
+default sizes of these dimensions are below it.
+Compiler must be built first (rebuild.bat).
+"""
+
+import os
+import sys
+import json
+import math
+import argparse
+import tempfile
+import subprocess
+
+from common import compile_source
+from program_generator import GENERATORS, generate
+
+
+# dimension: default sizes
+DIMENSIONS = {
+    'functions': [250, 500, 1000, 2000],
+    'statements': [1000, 2000, 4000, 8000],
+    'locals': [500, 1000, 2000, 4000],
+    'nested_blocks': [25, 50, 100],
+    'nested_functions': [25, 50, 100],
+    'expression': [100, 200, 400],
+    'list_literal': [10000, 20000, 40000, 80000],
+}
+
+# phases of ll_compiler.compile and listlang.compile_file, make_class is a part of walk
+TOP_PHASES = ['lex', 'parse', 'walk', 'assemble', 'jar']
+
+# growth of peak RSS smaller than this is noise of allocator
+MIN_RSS_GROWTH_KB = 1024
+
+# timer resolution is coarse on Windows, small programs may be compiled in "zero" time
+MIN_TIME = 1e-6
+
+
+def compile_profiled(compiler_dir, src_filename, work_dir, repeat):
+    """ Compiles program repeat times, returns (min compile time, peak RSS in KB or None, tokens) """
+    jar_filename = os.path.join(work_dir, 'program.jar')
+    json_filename = os.path.join(work_dir, 'profile.json')
+    times = []
+    peak_rss_kb = None
+    for _ in xrange(repeat):
+        compile_source(compiler_dir, src_filename, jar_filename, ['--no-cache', '--profile-json', json_filename],
+                       quiet=True)
+        with open(json_filename) as json_file:
+            profile = json.load(json_file)['files'].values()[0]
+        phases = profile['phases']
+        times.append(sum(phase['wall_time'] for phase in phases if phase['name'] in TOP_PHASES))
+        peak_rss_kb = max(phase['peak_rss_kb'] for phase in phases)
+    return max(min(times), MIN_TIME), peak_rss_kb, profile['counters']['tokens']
+
+
+def growth_exponent(points):
+    """ Least squares slope of log(value) over log(size) for [(size, value)] """
+    logs = [(math.log(size), math.log(value)) for size, value in points]
+    mean_x = sum(x for x, y in logs) / len(logs)
+    mean_y = sum(y for x, y in logs) / len(logs)
+    variance = sum((x - mean_x) ** 2 for x, y in logs)
+    return sum((x - mean_x) * (y - mean_y) for x, y in logs) / variance
+
+
+def main():
+    args_parser = argparse.ArgumentParser(description='Compiler scalability benchmark.')
+    args_parser.add_argument('--compiler-dir', default='build', help='directory with built listlang.py')
+    args_parser.add_argument('--dimensions', nargs='+', choices=sorted(GENERATORS), default=sorted(DIMENSIONS))
+    args_parser.add_argument('--scale', type=float, default=1.0, help='multiplier of default sizes')
+    args_parser.add_argument('--repeat', type=int, default=3, help='compiles of every program (default: 3)')
+    args_parser.add_argument('--max-exponent', type=float, default=1.25,
+                             help='max growth exponent of time and memory (default: 1.25)')
+    args = args_parser.parse_args()
+
+    compiler_dir = os.path.abspath(args.compiler_dir)
+    work_dir = tempfile.mkdtemp()
+    src_filename = os.path.join(work_dir, 'program.ll')
+
+    with open(src_filename, 'w') as src_file:
+        src_file.write('print 1\n')
+    base_rss_kb = compile_profiled(compiler_dir, src_filename, work_dir, 1)[1]
+
+    failed = []
+    print '%-18s %8s %9s %9s %12s %10s' % ('dimension', 'size', 'tokens', 'time, s', 'tokens/s', 'rss, MB')
+    for dimension in args.dimensions:
+        time_points = []
+        rss_points = []
+        for size in DIMENSIONS[dimension]:
+            size = max(2, int(size * args.scale))
+            with open(src_filename, 'w') as src_file:
+                src_file.write(generate(dimension, size))
+            try:
+                elapsed, peak_rss_kb, tokens = compile_profiled(compiler_dir, src_filename, work_dir, args.repeat)
+            except subprocess.CalledProcessError:
+                print '%-18s %8i FAILED' % (dimension, size)
+                failed.append('%s/%i' % (dimension, size))
+                break
+            time_points.append((tokens, elapsed))
+            rss = '-'
+            if peak_rss_kb is not None:
+                rss = '%.1f' % (peak_rss_kb / 1024.0)
+                if base_rss_kb is not None and peak_rss_kb - base_rss_kb >= MIN_RSS_GROWTH_KB:
+                    rss_points.append((tokens, peak_rss_kb - base_rss_kb))
+            print '%-18s %8i %9i %9.3f %12.0f %10s' % (dimension, size, tokens, elapsed, tokens / elapsed, rss)
+
+        exponents = []
+        if len(time_points) > 1:
+            exponents.append(('time', growth_exponent(time_points)))
+        if len(rss_points) > 1:
+            exponents.append(('memory', growth_exponent(rss_points)))
+        for name, exponent in exponents:
+            superlinear = exponent > args.max_exponent
+            if superlinear:
+                failed.append('%s %s' % (dimension, name))
+            print '%-18s %s growth exponent %.2f%s' % (dimension, name, exponent, ' SUPERLINEAR' if superlinear else '')
+        print
+
+    if failed:
+        sys.exit('failed: %s' % ', '.join(failed))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,11 @@
+// Iterates over a slice of a short list many times: for x in l[1:len(l)]
+l = read_list()
+n = read_element()
+s = 0
+while n > 0 {
+	for x in l[1:len(l)] {
+		s = s + x
+	}
+	n = n - 1
+}
+print s
@@ -0,0 +1,46 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+""" Compares "for x in l[a:b]" compiled without optimizations (slice and cursor are allocated on every loop entry)
+and with them (index loop over the original list). Allocation is shown by number of garbage collections.
+
+Compiler must be built first (rebuild.bat), java must be in PATH.
+"""
+
+import os
+import argparse
+import tempfile
+
+from common import BENCHMARK_DIR, compile_source, make_list_input, run_jar
+
+
+SOURCE_FILENAME = os.path.join(BENCHMARK_DIR, 'for_slice.ll')
+
+# small young generation makes every allocated megabyte visible as collections
+JAVA_ARGS = ['-Xmn4m', '-verbose:gc']
+
+
+def count_collections(gc_log):
+    return sum(1 for line in gc_log.splitlines() if 'GC' in line)
+
+
+def main():
+    args_parser = argparse.ArgumentParser(description='Slice loop fusion allocation benchmark.')
+    args_parser.add_argument('--compiler-dir', default='build', help='directory with built listlang.py')
+    args_parser.add_argument('--list-size', type=int, default=4)
+    args_parser.add_argument('--loops', type=int, default=5000000)
+    args = args_parser.parse_args()
+
+    input_data = make_list_input(args.list_size) + '%i\n' % args.loops
+    build_dir = tempfile.mkdtemp()
+
+    print '%10s %10s %12s' % ('opt-level', 'time, s', 'collections')
+    for opt_level in (0, 1):
+        jar_filename = os.path.join(build_dir, 'for_slice_O%i.jar' % opt_level)
+        compile_source(os.path.abspath(args.compiler_dir), SOURCE_FILENAME, jar_filename, ['-O', str(opt_level)])
+        elapsed, stdout, stderr = run_jar(jar_filename, input_data, JAVA_ARGS)
+        # -verbose:gc writes to stdout
+        print '%10i %10.3f %12i' % (opt_level, elapsed, count_collections(stdout + stderr))
+
+
+if __name__ == "__main__":
+    main()
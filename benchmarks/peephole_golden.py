@@ -0,0 +1,129 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+""" Golden test of peephole optimizer: every examples/*.ll is compiled at -O1 and numbers of instructions of
+every method right before and right after peephole.optimize are compared with numbers saved in
+peephole_golden.json. No method may grow in the pass. After intended changes of code generation or of
+peephole rules golden numbers are saved again:
+
+    python peephole_golden.py --update
+
+Compiler must be built first (rebuild.bat), it needs ANTLR runtime, but not java.
+"""
+
+import os
+import sys
+import glob
+import json
+import argparse
+import subprocess
+
+from common import BENCHMARK_DIR
+
+
+EXAMPLES_DIR = os.path.join(os.path.dirname(BENCHMARK_DIR), 'examples')
+GOLDEN_FILENAME = os.path.join(BENCHMARK_DIR, 'peephole_golden.json')
+
+
+def count_instructions(commands):
+    """ Number of commands which are not labels, comments or directives """
+    number = 0
+    for command in commands:
+        command = command.strip()
+        if command and not command.startswith(('.', ';')) and not command.endswith(':'):
+            number += 1
+    return number
+
+
+def method_counts(compiler_dir, src_filename):
+    """ Compiles source at -O1, returns {method name: [instructions before peephole pass, after it]} """
+    sys.path.insert(0, compiler_dir)
+    import listlang
+    from llcompiler import jcodemaker
+
+    counts = {}
+    methods = []
+    make_method = jcodemaker.JCodeMaker.make_method
+    optimize = jcodemaker.peephole.optimize
+
+    def watched_make_method(code_maker, name, *args, **kwargs):
+        methods.append(name)
+        try:
+            return make_method(code_maker, name, *args, **kwargs)
+        finally:
+            methods.pop()
+
+    def watched_optimize(commands, *args, **kwargs):
+        optimized = optimize(commands, *args, **kwargs)
+        counts[methods[-1]] = [count_instructions(commands), count_instructions(optimized)]
+        return optimized
+
+    jcodemaker.JCodeMaker.make_method = watched_make_method
+    jcodemaker.peephole.optimize = watched_optimize
+    listlang.make_jasmin_file(src_filename, os.devnull, opt_level=1)
+    return counts
+
+
+def main():
+    args_parser = argparse.ArgumentParser(description='Golden test of instruction counts of peephole pass.')
+    args_parser.add_argument('--compiler-dir', default='build', help='directory with built listlang.py')
+    args_parser.add_argument('--update', action='store_true', help='save current numbers as golden ones')
+    args_parser.add_argument('--example', help=argparse.SUPPRESS)
+    args = args_parser.parse_args()
+    compiler_dir = os.path.abspath(args.compiler_dir)
+
+    if args.example:
+        print json.dumps(method_counts(compiler_dir, args.example))
+        return
+
+    golden = {}
+    if not args.update:
+        with open(GOLDEN_FILENAME) as golden_file:
+            golden = json.load(golden_file)
+
+    counts = {}
+    failed = []
+    print '%-24s %-24s %8s %8s  %s' % ('example', 'method', 'before', 'after', 'golden')
+    for filename in sorted(glob.glob(os.path.join(EXAMPLES_DIR, '*.ll'))):
+        name = os.path.basename(filename)
+        # every example is compiled by its own process, so no compile state is shared between examples
+        process = subprocess.Popen(
+            [sys.executable, os.path.abspath(__file__), '--compiler-dir', compiler_dir, '--example', filename],
+            stdout=subprocess.PIPE, stderr=subprocess.PIPE
+        )
+        stdout = process.communicate()[0]
+        if process.returncode != 0:
+            # examples of compile errors
+            continue
+        example_counts = counts[name] = json.loads(stdout.splitlines()[-1])
+
+        expected = golden.get(name, {})
+        for method in sorted(set(example_counts) | set(expected)):
+            if method not in example_counts:
+                failed.append('%s %s is missing' % (name, method))
+                continue
+            before, after = example_counts[method]
+            if after > before:
+                failed.append('%s %s grew in peephole pass' % (name, method))
+            if args.update:
+                state = 'saved'
+            elif expected.get(method) == [before, after]:
+                state = 'ok'
+            else:
+                state = 'MISMATCH, expected %s' % (expected.get(method),)
+                failed.append('%s %s instruction counts' % (name, method))
+            print '%-24s %-24s %8i %8i  %s' % (name, method, before, after, state)
+
+    for name in sorted(set(golden) - set(counts)):
+        failed.append('%s is missing' % name)
+
+    if args.update:
+        with open(GOLDEN_FILENAME, 'w') as golden_file:
+            json.dump(counts, golden_file, indent=2, sort_keys=True, separators=(',', ': '))
+            golden_file.write('\n')
+
+    if failed:
+        sys.exit('failed:\n%s' % '\n'.join(failed))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+""" Generator of big synthetic ListLang programs, every generator makes program which grows in one dimension:
+
+    python program_generator.py functions 1000 > tmp/functions.ll
+"""
+
+import argparse
+
+
+def block(lines, depth):
+    return ['\t' * depth + line for line in lines]
+
+
+def functions(size):
+    """ size functions and main which calls all of them """
+    lines = []
+    for i in xrange(size):
+        lines.extend([
+            'define f%i(Element x, List l) {' % i,
+            '\ty = x * %i + len(l)' % (i % 7 + 1),
+            '\tif y > %i {' % (i % 100),
+            '\t\ty = y - %i' % (i % 10),
+            '\t}',
+            '\treturn y',
+            '}',
+        ])
+    lines.append('s = 0')
+    lines.append('l = [1, 2, 3]')
+    for i in xrange(size):
+        lines.append('s = s + f%i(%i, l)' % (i, i))
+    lines.append('print s')
+    return lines
+
+
+def statements(size):
+    """ main of size statements of different kinds """
+    lines = ['a = 1', 'l = [1, 2, 3]']
+    for i in xrange(size):
+        kind = i % 4
+        if kind == 0:
+            lines.append('a = a + %i' % i)
+        elif kind == 1:
+            lines.append('l = l + a')
+        elif kind == 2:
+            lines.extend(['if a > %i {' % i, '\ta = a - 1', '}'])
+        else:
+            lines.append('print a, len(l)')
+    return lines
+
+
+def local_variables(size):
+    """ function with size local variables """
+    lines = ['define many(Element x) {', '\tv0 = x']
+    for i in xrange(1, size):
+        lines.append('\tv%i = v%i + %i' % (i, i - 1, i % 10))
+    lines.extend(['\treturn v%i' % (size - 1), '}', 'print many(1)'])
+    return lines
+
+
+def nested_blocks(size):
+    """ if and for blocks nested size levels deep """
+    lines = ['a = 0', 'l = [1, 2, 3]']
+    for depth in xrange(size):
+        lines.extend(block(['a = a + %i' % depth], depth))
+        if depth % 2:
+            lines.extend(block(['for x%i in l {' % depth], depth))
+        else:
+            lines.extend(block(['if a < %i {' % (depth + 10)], depth))
+    lines.extend(block(['print a'], size))
+    for depth in reversed(xrange(size)):
+        lines.extend(block(['}'], depth))
+    return lines
+
+
+def nested_functions(size):
+    """ function definitions nested size levels deep, every function calls function defined in it """
+    lines = []
+    for depth in xrange(size):
+        lines.extend(block(['define g%i(Element x) {' % depth], depth))
+    lines.extend(block(['return x + 1'], size))
+    for depth in reversed(xrange(size)):
+        if depth + 1 < size:
+            lines.extend(block(['return g%i(x) + 1' % (depth + 1)], depth + 1))
+        lines.extend(block(['}'], depth))
+    lines.append('print g0(1)')
+    return lines
+
+
+def expression(size):
+    """ expression of size operands, operator trees of ANTLR are as deep as long is expression """
+    operators = ['+', '-', '*', '+']
+    terms = ['a']
+    for i in xrange(1, size):
+        terms.append('%s %s' % (operators[i % len(operators)], 'b' if i % 3 else str(i)))
+    return ['a = 1', 'b = 2', 'x = %s' % ' '.join(terms), 'print x']
+
+
+def list_literal(size):
+    """ constant list literal of size elements and computed one of size / 10 elements """
+    computed = ['a + %i' % i for i in xrange(max(1, size // 10))]
+    return [
+        'a = 1',
+        'l = [%s]' % ', '.join(str(i % 1000) for i in xrange(size)),
+        'm = [%s]' % ', '.join(computed),
+        'print len(l) + len(m)',
+    ]
+
+
+GENERATORS = {
+    'functions': functions,
+    'statements': statements,
+    'locals': local_variables,
+    'nested_blocks': nested_blocks,
+    'nested_functions': nested_functions,
+    'expression': expression,
+    'list_literal': list_literal,
+}
+
+
+def generate(dimension, size):
+    """ Returns source of program of size in dimension """
+    return '\n'.join(GENERATORS[dimension](size)) + '\n'
+
+
+def main():
+    args_parser = argparse.ArgumentParser(description='Generate big synthetic ListLang program.')
+    args_parser.add_argument('dimension', choices=sorted(GENERATORS))
+    args_parser.add_argument('size', type=int)
+    args = args_parser.parse_args()
+
+    print generate(args.dimension, args.size),
+
+
+if __name__ == "__main__":
+    main()
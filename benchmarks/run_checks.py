@@ -0,0 +1,79 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+""" Semantic checks of compiled programs: every checks/NAME.ll is compiled at every optimization level and run
+with input of checks/NAME.in (if it exists), its output must be the same as checks/NAME.out. Optimizations
+must not change results of programs, so this is run after changes of List.java, jtrans.py or jescape.py:
+
+    python run_checks.py
+
+Program which must fail has checks/NAME.err instead of NAME.out, with text its error output must contain.
+Compiler must be built first (rebuild.bat), java must be in PATH.
+"""
+
+import os
+import sys
+import glob
+import argparse
+import tempfile
+
+from common import BENCHMARK_DIR, compile_source, run_jar
+
+
+CHECKS_DIR = os.path.join(BENCHMARK_DIR, 'checks')
+
+OPT_LEVELS = (0, 1)
+
+
+def read_file(filename, default=None):
+    """ Returns content of file, default if file doesn't exist and default is given """
+    if default is not None and not os.path.exists(filename):
+        return default
+    with open(filename) as check_file:
+        return check_file.read()
+
+
+def main():
+    args_parser = argparse.ArgumentParser(description='Semantic checks of compiled ListLang programs.')
+    args_parser.add_argument('--compiler-dir', default='build', help='directory with built listlang.py')
+    args_parser.add_argument('checks', nargs='*', help='names of checks (default: all of checks directory)')
+    args = args_parser.parse_args()
+
+    names = args.checks or sorted(
+        os.path.splitext(os.path.basename(filename))[0] for filename in glob.glob(os.path.join(CHECKS_DIR, '*.ll'))
+    )
+    build_dir = tempfile.mkdtemp()
+    failed = []
+
+    for name in names:
+        src_filename = os.path.join(CHECKS_DIR, name + '.ll')
+        input_data = read_file(os.path.join(CHECKS_DIR, name + '.in'), '')
+        expected_error = read_file(os.path.join(CHECKS_DIR, name + '.err'), '').strip()
+        expected = read_file(os.path.join(CHECKS_DIR, name + '.out'), '' if expected_error else None)
+        for opt_level in OPT_LEVELS:
+            jar_filename = os.path.join(build_dir, '%s_O%i.jar' % (name, opt_level))
+            compile_source(os.path.abspath(args.compiler_dir), src_filename, jar_filename, ['-O', str(opt_level)],
+                           quiet=True)
+            try:
+                stdout = run_jar(jar_filename, input_data)[1]
+                error = ''
+            except RuntimeError as e:
+                stdout, error = '', str(e)
+            if expected_error:
+                passed = expected_error in error
+            else:
+                # print puts space after every value
+                passed = not error and stdout.split() == expected.split()
+            if not passed:
+                print '%-24s -O%i FAILED\nexpected:\n%s\ngot:\n%s' % (
+                    name, opt_level, expected_error or expected, error or stdout
+                )
+                failed.append('%s/O%i' % (name, opt_level))
+            else:
+                print '%-24s -O%i ok' % (name, opt_level)
+
+    if failed:
+        sys.exit('failed: %s' % ', '.join(failed))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,210 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+""" Runtime benchmark suite: compiles workloads/*.ll, runs them at several input sizes and checks their output.
+
+Every run starts new JVM, so warmup runs only warm up disk caches and time includes JVM start. Median of
+repetitions is compared with saved baseline, workloads which are slower (or use more memory) than baseline by
+more than threshold are flagged as regressions:
+
+    python runtime_suite.py --save tmp/baseline.json
+    ... change List.java, jtrans.py or jcodemaker.py, rebuild ...
+    python runtime_suite.py --baseline tmp/baseline.json
+
+Compiler must be built first (rebuild.bat), java must be in PATH.
+"""
+
+import os
+import sys
+import json
+import random
+import argparse
+import tempfile
+
+from common import BENCHMARK_DIR, compile_source, run_jar_measured
+
+
+WORKLOADS_DIR = os.path.join(BENCHMARK_DIR, 'workloads')
+
+SEED = 1
+
+
+def format_list(values):
+    return '[%s]' % ', '.join(str(value) for value in values)
+
+
+def random_values(size, max_value=100):
+    generator = random.Random(SEED)
+    return [generator.randrange(max_value) for _ in xrange(size)]
+
+
+def sort_input(size):
+    values = random_values(size, 1000000)
+    return format_list(values) + '\n', format_list(sorted(values))
+
+
+def merge_input(size):
+    first = sorted(random_values(size // 2, 1000000))
+    second = sorted(random_values(size - size // 2, 1000))
+    return format_list(first) + '\n' + format_list(second) + '\n', format_list(sorted(first + second))
+
+
+def reverse_input(size):
+    values = random_values(size)
+    return format_list(values) + '\n', format_list(values[::-1])
+
+
+def count_input(size):
+    values = random_values(size)
+    return format_list(values) + '\n', str(sum(values))
+
+
+def sum_input(size):
+    values = random_values(size)
+    return format_list(values) + '\n', str(sum(values))
+
+
+def list_literals_input(size):
+    return '%i\n' % size, str(sum(11 + (i + 2) % 10 for i in xrange(size)))
+
+
+def printing_input(size):
+    values = random_values(size)
+    return format_list(values) + '\n', '\n'.join(str(value) for value in values) + '\n' + format_list(values)
+
+
+def reading_input(size):
+    values = random_values(size)
+    return format_list(values) + '\n', '%i %i' % (size, sum(values))
+
+
+# name: (function returning (input, expected output) for size, default sizes)
+WORKLOADS = {
+    'sort': (sort_input, [10000, 100000, 300000]),
+    'merge': (merge_input, [100000, 1000000]),
+    'reverse': (reverse_input, [100000, 1000000]),
+    'count': (count_input, [100000, 1000000]),
+    'slicing': (sum_input, [100000, 1000000]),
+    'list_literals': (list_literals_input, [100000, 1000000]),
+    'printing': (printing_input, [100000, 1000000]),
+    'reading': (reading_input, [100000, 1000000, 3000000]),
+}
+
+
+def median(values):
+    values = sorted(values)
+    middle = len(values) // 2
+    if len(values) % 2:
+        return values[middle]
+    return (values[middle - 1] + values[middle]) / 2.0
+
+
+def run_workload(jar_filename, input_data, expected, warmup, repeat, java_args):
+    """ Returns {'median', 'min', 'peak_rss_kb'} of repeat runs or raises RuntimeError if output is wrong """
+    times = []
+    peaks = []
+    for run in xrange(warmup + repeat):
+        elapsed, stdout, peak_rss_kb = run_jar_measured(jar_filename, input_data, java_args)
+        # print puts space after every value
+        if stdout.split() != expected.split():
+            raise RuntimeError('wrong output: %r...' % stdout[:200])
+        if run >= warmup:
+            times.append(elapsed)
+            peaks.append(peak_rss_kb)
+    return {
+        'median': median(times),
+        'min': min(times),
+        'peak_rss_kb': None if None in peaks else max(peaks),
+    }
+
+
+def compare(measure, base, threshold):
+    """ Returns flags of measure against base measure of baseline """
+    flags = []
+    ratio = measure['median'] / base['median']
+    if ratio > 1 + threshold:
+        flags.append('REGRESSION x%.2f' % ratio)
+    elif ratio < 1 - threshold:
+        flags.append('improved x%.2f' % ratio)
+    if measure['peak_rss_kb'] and base.get('peak_rss_kb'):
+        rss_ratio = float(measure['peak_rss_kb']) / base['peak_rss_kb']
+        if rss_ratio > 1 + threshold:
+            flags.append('RSS REGRESSION x%.2f' % rss_ratio)
+    return flags
+
+
+def main():
+    args_parser = argparse.ArgumentParser(description='Runtime benchmark suite of compiled ListLang programs.')
+    args_parser.add_argument('--compiler-dir', default='build', help='directory with built listlang.py')
+    args_parser.add_argument('--compiler-args', default='', help='options of listlang.py, for example "-O 0"')
+    args_parser.add_argument('--java-args', default='-Xss64m', help='options of java (default: -Xss64m)')
+    args_parser.add_argument('--workloads', nargs='+', choices=sorted(WORKLOADS), default=sorted(WORKLOADS))
+    args_parser.add_argument('--scale', type=float, default=1.0, help='multiplier of default input sizes')
+    args_parser.add_argument('--warmup', type=int, default=1, help='runs before measured ones (default: 1)')
+    args_parser.add_argument('--repeat', type=int, default=5, help='measured runs (default: 5)')
+    args_parser.add_argument('--save', metavar='FILE', help='save results as baseline JSON file')
+    args_parser.add_argument('--baseline', metavar='FILE', help='compare results with baseline JSON file')
+    args_parser.add_argument('--threshold', type=float, default=0.1,
+                             help='relative slowdown flagged as regression (default: 0.1)')
+    args = args_parser.parse_args()
+
+    baseline = {}
+    if args.baseline:
+        with open(args.baseline) as baseline_file:
+            baseline = json.load(baseline_file)['results']
+
+    build_dir = tempfile.mkdtemp()
+    compiler_args = args.compiler_args.split()
+    java_args = args.java_args.split()
+    results = {}
+    regressions = []
+    failed = []
+
+    print '%-14s %9s %9s %9s %14s %10s  %s' % ('workload', 'size', 'median, s', 'min, s', 'elements/s',
+                                              'rss, MB', 'baseline')
+    for name in args.workloads:
+        make_input, sizes = WORKLOADS[name]
+        jar_filename = os.path.join(build_dir, name + '.jar')
+        compile_source(os.path.abspath(args.compiler_dir), os.path.join(WORKLOADS_DIR, name + '.ll'), jar_filename,
+                       compiler_args)
+
+        results[name] = {}
+        for size in sizes:
+            size = max(1, int(size * args.scale))
+            input_data, expected = make_input(size)
+            try:
+                measure = run_workload(jar_filename, input_data, expected, args.warmup, args.repeat, java_args)
+            except RuntimeError as e:
+                print '%-14s %9i FAILED: %s' % (name, size, str(e).strip())
+                failed.append('%s/%i' % (name, size))
+                continue
+            results[name][str(size)] = measure
+
+            base = baseline.get(name, {}).get(str(size))
+            flags = compare(measure, base, args.threshold) if base else ['-']
+            if [flag for flag in flags if 'REGRESSION' in flag]:
+                regressions.append('%s/%i' % (name, size))
+            rss = '-' if measure['peak_rss_kb'] is None else '%.1f' % (measure['peak_rss_kb'] / 1024.0)
+            print '%-14s %9i %9.3f %9.3f %14.0f %10s  %s' % (
+                name, size, measure['median'], measure['min'], size / measure['median'], rss,
+                ', '.join(flags) or 'ok'
+            )
+
+    if args.save:
+        with open(args.save, 'w') as save_file:
+            json.dump({
+                'compiler_args': compiler_args,
+                'java_args': java_args,
+                'repeat': args.repeat,
+                'results': results,
+            }, save_file, indent=2, sort_keys=True)
+
+    if failed:
+        print '\nfailed: %s' % ', '.join(failed)
+    if regressions:
+        print '\nregressions: %s' % ', '.join(regressions)
+    if failed or regressions:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,10 @@
+// Sum of list elements through slice recursion: every call takes l[1:len(l)]
+define sum(List l) {
+	if not l {
+		return 0
+	}
+	return l[0] + sum(l[1:len(l)])
+}
+
+l = read_list()
+print sum(l)
@@ -0,0 +1,46 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+""" Measures how run time of slice-heavy recursion grows with input size.
+
+With copying slices the growth exponent is close to 2, with slice views it is close to 1.
+Compiler must be built first (rebuild.bat), java must be in PATH.
+"""
+
+import os
+import math
+import argparse
+import tempfile
+
+from common import BENCHMARK_DIR, compile_source, make_list_input, best_run
+
+
+SOURCE_FILENAME = os.path.join(BENCHMARK_DIR, 'slice_recursion.ll')
+
+# recursion depth is equal to input size
+JAVA_ARGS = ['-Xss1g']
+
+
+def main():
+    args_parser = argparse.ArgumentParser(description='Slice recursion scaling benchmark.')
+    args_parser.add_argument('--compiler-dir', default='build', help='directory with built listlang.py')
+    args_parser.add_argument('--sizes', type=int, nargs='+', default=[10000, 20000, 40000, 80000])
+    args_parser.add_argument('--repeat', type=int, default=3)
+    args = args_parser.parse_args()
+
+    jar_filename = os.path.join(tempfile.mkdtemp(), 'slice_recursion.jar')
+    compile_source(os.path.abspath(args.compiler_dir), SOURCE_FILENAME, jar_filename)
+
+    print '%10s %10s %10s' % ('size', 'time, s', 'exponent')
+    previous = None
+    for size in args.sizes:
+        elapsed = best_run(jar_filename, make_list_input(size), args.repeat, JAVA_ARGS)
+        exponent = ''
+        if previous:
+            prev_size, prev_elapsed = previous
+            exponent = '%.2f' % (math.log(elapsed / prev_elapsed) / math.log(float(size) / prev_size))
+        print '%10i %10.3f %10s' % (size, elapsed, exponent)
+        previous = size, elapsed
+
+
+if __name__ == "__main__":
+    main()
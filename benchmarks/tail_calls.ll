@@ -0,0 +1,10 @@
+// Sum of list elements through tail recursion: every call takes l[1:len(l)] and the accumulated sum
+define sum(List l, Element acc) {
+	if not l {
+		return acc
+	}
+	return sum(l[1:len(l)], acc + l[0])
+}
+
+l = read_list()
+print sum(l, 0)
@@ -0,0 +1,60 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+""" Runs tail recursion of depth equal to input size with default thread stack.
+
+Without tail call elimination deep recursion fails with StackOverflowError, with it the program runs in
+constant stack and prints the right sum. Benchmark fails if any run with tail calls (including one of
+--required-size) doesn't print the right sum.
+Compiler must be built first (rebuild.bat), java must be in PATH.
+"""
+
+import os
+import sys
+import argparse
+import tempfile
+
+from common import BENCHMARK_DIR, compile_source, make_list_input, run_jar
+
+
+SOURCE_FILENAME = os.path.join(BENCHMARK_DIR, 'tail_calls.ll')
+
+
+def main():
+    args_parser = argparse.ArgumentParser(description='Self tail call elimination benchmark.')
+    args_parser.add_argument('--compiler-dir', default='build', help='directory with built listlang.py')
+    args_parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 100000, 1000000])
+    args_parser.add_argument('--required-size', type=int, default=1000000,
+                             help='size always run, tail calls must run it in default stack (default: 1000000)')
+    args = args_parser.parse_args()
+
+    build_dir = tempfile.mkdtemp()
+    jars = []
+    for tail_calls in (False, True):
+        jar_filename = os.path.join(build_dir, 'tail_calls_%s.jar' % ('on' if tail_calls else 'off'))
+        compile_source(os.path.abspath(args.compiler_dir), SOURCE_FILENAME, jar_filename,
+                       [] if tail_calls else ['--no-tail-calls'])
+        jars.append((tail_calls, jar_filename))
+
+    failed = []
+    print '%10s %10s %10s %10s' % ('size', 'tail calls', 'time, s', 'result')
+    for size in sorted(set(args.sizes) | set([args.required_size])):
+        input_data = make_list_input(size)
+        expected = sum(i % 100 for i in xrange(size))
+        for tail_calls, jar_filename in jars:
+            try:
+                elapsed, stdout, stderr = run_jar(jar_filename, input_data)
+            except RuntimeError as e:
+                result = 'overflow' if 'StackOverflowError' in str(e) else 'failed'
+                print '%10i %10s %10s %10s' % (size, tail_calls, '-', result)
+            else:
+                result = 'ok' if stdout.split() == [str(expected)] else 'wrong'
+                print '%10i %10s %10.3f %10s' % (size, tail_calls, elapsed, result)
+            if tail_calls and result != 'ok':
+                failed.append('%i: %s' % (size, result))
+
+    if failed:
+        sys.exit('tail calls failed at sizes %s' % ', '.join(failed))
+
+
+if __name__ == "__main__":
+    main()
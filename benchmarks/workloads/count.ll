@@ -0,0 +1,9 @@
+// Counts every value of 0..99 in input list
+l = read_list()
+total = 0
+i = 0
+while i < 100 {
+	total = total + count(l, i) * i
+	i = i + 1
+}
+print total
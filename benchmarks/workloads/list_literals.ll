@@ -0,0 +1,11 @@
+// Makes constant and computed list literals and concatenates them, input is number of iterations
+n = read_element()
+total = 0
+i = 0
+while i < n {
+	a = [1, 2, 3, 4, 5, 6, 7, 8]
+	b = [i, i + 1, i + 2]
+	total = total + len(a + b) + b[2] % 10
+	i = i + 1
+}
+print total
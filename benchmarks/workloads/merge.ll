@@ -0,0 +1,18 @@
+// Merges two sorted input lists into one sorted list
+define merge(List l1, List l2) {
+	result = []
+	while l1 and l2 {
+		if l1[0] < l2[0] {
+			result = result + l1[0]
+			--l1
+		} else {
+			result = result + l2[0]
+			--l2
+		}
+	}
+	return result + l1 + l2
+}
+
+l1 = read_list()
+l2 = read_list()
+print merge(l1, l2)
@@ -0,0 +1,6 @@
+// Prints every element of input list on its own line and then the whole list
+l = read_list()
+for x in l {
+	print x
+}
+print l
@@ -0,0 +1,7 @@
+// Reads input list, prints its length and sum of its elements
+l = read_list()
+s = 0
+for x in l {
+	s = s + x
+}
+print len(l), s
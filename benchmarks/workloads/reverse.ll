@@ -0,0 +1,12 @@
+// Reverses input list by adding elements to the front of result
+define reverse(List l) {
+	result = []
+	while l {
+		result = l[0] + result
+		--l
+	}
+	return result
+}
+
+l = read_list()
+print reverse(l)
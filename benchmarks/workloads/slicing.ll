@@ -0,0 +1,15 @@
+// Sum of input list by recursion on halves, every call takes two slices
+define sum(List l) {
+	n = len(l)
+	if n == 0 {
+		return 0
+	}
+	if n == 1 {
+		return l[0]
+	}
+	half = n / 2
+	return sum(l[0:half]) + sum(l[half:n])
+}
+
+l = read_list()
+print sum(l)
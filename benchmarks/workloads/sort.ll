@@ -0,0 +1,22 @@
+// Quicksort of input list, partitions are built by appending to lists
+define quickSort(List l) {
+	if not l {
+		return []
+	}
+	
+	pivot = l[0]
+	low = []
+	high = []
+	for x in l[1:len(l)] {
+		if x < pivot {
+			low = low + x
+		} else {
+			high = high + x
+		}
+	}
+	
+	return quickSort(low) + [pivot] + quickSort(high)
+}
+
+l = read_list()
+print quickSort(l)
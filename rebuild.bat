@@ -10,12 +10,13 @@ ECHO rebuild: antlr grammar
 java -jar %ANTLR_JAR_FILE% -fo src\llcompiler -make src\ListLang.g
 java -jar %ANTLR_JAR_FILE% -fo src\llcompiler -make src\ListLangWalker.g
 
-ECHO rebuild: java List
-CALL "%JDK_HOME%javac.exe" -d build\adds src\List.java
+ECHO rebuild: java runtime
+CALL "%JDK_HOME%javac.exe" -d build\adds src\List.java src\IO.java src\Counters.java
 
 ECHO rebuild: make llcompiler
 copy jasmin.jar build\
 copy src\listlang.py build\
+copy src\llclient.py build\
 copy src\readme.txt build\
 xcopy src\adds build\adds\ /e /y
 IF ERRORLEVEL 1 GOTO EXIT
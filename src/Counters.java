@@ -0,0 +1,112 @@
+package listlang.objects;
+
+import java.io.FileOutputStream;
+import java.io.IOException;
+import java.io.OutputStreamWriter;
+import java.io.Writer;
+
+// runtime counters of programs compiled with --instrument, they are written as JSON
+// on exit to file of "listlang.counters" system property (default: listlang-counters.json)
+public class Counters {
+
+	static final String FILE_PROPERTY = "listlang.counters";
+	static final String DEFAULT_FILE = "listlang-counters.json";
+
+	// operations of List, clone and slice are views, elements are copied
+	// by the first write into them and counted as copyOnWrite
+	static final int NEW = 0;
+	static final int CLONE = 1;
+	static final int SLICE = 2;
+	static final int CONCAT = 3;
+	static final int APPEND_ALL = 4;
+	static final int MULTIPLY = 5;
+	static final int REMOVE_EVERY = 6;
+	static final int GROW = 7;
+	static final int COPY_ON_WRITE = 8;
+	private static final String[] OPERATIONS = {
+		"new", "clone", "slice", "concat", "appendAll", "multiply", "removeEvery", "grow", "copyOnWrite"
+	};
+
+	// List counts operations only in instrumented programs
+	static boolean enabled = false;
+
+	// "group:name" of counters of compiled program, group is "calls" or "loops"
+	private static String[] names = new String[0];
+	private static long[] hits = new long[0];
+
+	private static final long[] operations = new long[OPERATIONS.length];
+	private static final long[] copiedBytes = new long[OPERATIONS.length];
+	private static long allocations = 0;
+	private static long allocatedBytes = 0;
+
+	// called by static initializer of compiled program, names are comma separated
+	public static void start(String counterNames) {
+		names = counterNames.isEmpty() ? new String[0] : counterNames.split(",");
+		hits = new long[names.length];
+		enabled = true;
+		Runtime.getRuntime().addShutdownHook(new Thread() {
+			public void run() {
+				dump(System.getProperty(FILE_PROPERTY, DEFAULT_FILE));
+			}
+		});
+	}
+
+	// counts call of function or iteration of loop
+	public static void hit(int counter) {
+		hits[counter]++;
+	}
+
+	static void operation(int operation, int copiedElements) {
+		operations[operation]++;
+		copiedBytes[operation] += 4L * copiedElements;
+	}
+
+	static void allocation(int capacity) {
+		allocations++;
+		allocatedBytes += 4L * capacity;
+	}
+
+	private static void dump(String fileName) {
+		StringBuilder json = new StringBuilder();
+		json.append("{\n");
+		appendGroup(json, "calls");
+		json.append(",\n");
+		appendGroup(json, "loops");
+		json.append(",\n  \"lists\": {\n");
+		json.append("    \"allocations\": ").append(allocations).append(",\n");
+		json.append("    \"allocated_bytes\": ").append(allocatedBytes).append(",\n");
+		json.append("    \"operations\": {");
+		for(int i = 0; i < OPERATIONS.length; i++) {
+			json.append(i > 0 ? ",\n" : "\n");
+			json.append("      \"").append(OPERATIONS[i]).append("\": {\"count\": ").append(operations[i]);
+			json.append(", \"copied_bytes\": ").append(copiedBytes[i]).append('}');
+		}
+		json.append("\n    }\n  }\n}\n");
+
+		try {
+			Writer writer = new OutputStreamWriter(new FileOutputStream(fileName), "UTF-8");
+			try {
+				writer.write(json.toString());
+			} finally {
+				writer.close();
+			}
+		} catch(IOException e) {
+			System.err.println("can't write counters to " + fileName + ": " + e);
+		}
+	}
+
+	private static void appendGroup(StringBuilder json, String group) {
+		json.append("  \"").append(group).append("\": {");
+		String prefix = group + ":";
+		boolean first = true;
+		for(int i = 0; i < names.length; i++) {
+			if(!names[i].startsWith(prefix)) {
+				continue;
+			}
+			json.append(first ? "\n" : ",\n");
+			first = false;
+			json.append("    \"").append(names[i].substring(prefix.length())).append("\": ").append(hits[i]);
+		}
+		json.append(first ? "}" : "\n  }");
+	}
+}
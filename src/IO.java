@@ -0,0 +1,245 @@
+package listlang.objects;
+
+import java.io.FileDescriptor;
+import java.io.FileInputStream;
+import java.io.FileOutputStream;
+import java.io.IOException;
+import java.io.InputStream;
+import java.io.OutputStream;
+import java.util.InputMismatchException;
+import java.util.NoSuchElementException;
+
+public class IO {
+
+	static final int OUT_BUFFER_SIZE = 1 << 16;
+	static final int IN_BUFFER_SIZE = 1 << 16;
+	// "-2147483648"
+	static final int MAX_INT_CHARS = 11;
+
+	private static final OutputStream out = new FileOutputStream(FileDescriptor.out);
+	private static final byte[] outBuffer = new byte[OUT_BUFFER_SIZE];
+	private static int outPos = 0;
+
+	private static final InputStream in = new FileInputStream(FileDescriptor.in);
+	private static final byte[] inBuffer = new byte[IN_BUFFER_SIZE];
+	private static int inPos = 0;
+	private static int inLength = 0;
+
+	static {
+		// flush output of programs finished by exception or System.exit
+		Runtime.getRuntime().addShutdownHook(new Thread() {
+			public void run() {
+				flush();
+			}
+		});
+	}
+
+	// output
+
+	public static void print(int n) {
+		reserve(MAX_INT_CHARS);
+		int negative = n;
+		if(negative < 0) {
+			outBuffer[outPos++] = '-';
+		} else {
+			negative = -negative;	// negative range also holds Integer.MIN_VALUE
+		}
+		int end = outPos + digitsCount(negative);
+		outPos = end;
+		do {
+			outBuffer[--end] = (byte) ('0' - negative % 10);
+			negative /= 10;
+		} while(negative != 0);
+	}
+
+	public static void print(String str) {
+		byte[] bytes = str.getBytes();
+		if(bytes.length > OUT_BUFFER_SIZE - outPos) {
+			flush();
+			if(bytes.length > OUT_BUFFER_SIZE) {
+				writeOut(bytes, bytes.length);
+				return;
+			}
+		}
+		System.arraycopy(bytes, 0, outBuffer, outPos, bytes.length);
+		outPos += bytes.length;
+	}
+
+	static void print(char c) {
+		reserve(1);
+		outBuffer[outPos++] = (byte) c;
+	}
+
+	public static void flush() {
+		if(outPos > 0) {
+			writeOut(outBuffer, outPos);
+			outPos = 0;
+		}
+	}
+
+	private static void reserve(int size) {
+		if(outPos + size > OUT_BUFFER_SIZE) {
+			flush();
+		}
+	}
+
+	private static void writeOut(byte[] bytes, int length) {
+		try {
+			out.write(bytes, 0, length);
+			out.flush();
+		} catch (IOException e) {
+			e.printStackTrace();
+		}
+	}
+
+	private static int digitsCount(int negative) {
+		int count = 1;
+		while(negative <= -10) {
+			negative /= 10;
+			count++;
+		}
+		return count;
+	}
+
+	// input
+
+	// reads next integer, skipping whitespace and line breaks before it
+	public static int readInt() {
+		int c = skipSpaces(true);
+		if(c == -1) {
+			throw new NoSuchElementException();
+		}
+		if(!isNumberStart(c)) {
+			throw new InputMismatchException();
+		}
+		return parseInt();
+	}
+
+	// reads list in format "[1, -2, 3]" from the next non-empty line into list,
+	// returns false and skips the line if it has wrong format
+	static boolean readList(List list) {
+		int c = skipSpaces(true);
+		if(c != '[') {
+			skipLine();
+			return false;
+		}
+		inPos++;
+		c = skipSpaces(false);
+		if(c == ']') {
+			inPos++;
+			return endOfLine();
+		}
+		while(true) {
+			if(!isNumberStart(c)) {
+				skipLine();
+				return false;
+			}
+			try {
+				list.addLast(parseInt());
+			} catch (InputMismatchException e) {
+				skipLine();
+				return false;
+			}
+			c = skipSpaces(false);
+			if(c == ']') {
+				inPos++;
+				return endOfLine();
+			} else if(c != ',') {
+				skipLine();
+				return false;
+			}
+			inPos++;
+			c = skipSpaces(false);
+		}
+	}
+
+	// parses number at current position, first char must satisfy isNumberStart
+	private static int parseInt() {
+		int c = peek();
+		boolean negative = c == '-';
+		if(negative) {
+			inPos++;
+			c = peek();
+			if(!isDigit(c)) {
+				throw new InputMismatchException();
+			}
+		}
+		int value = 0;	// accumulated negative to hold Integer.MIN_VALUE
+		int limit = negative ? Integer.MIN_VALUE : -Integer.MAX_VALUE;
+		while(isDigit(c)) {
+			int digit = c - '0';
+			// as Integer.parseInt, numbers out of int range don't wrap
+			if(value < limit / 10 || value * 10 < limit + digit) {
+				throw new NumberFormatException("number is out of int range");
+			}
+			value = value * 10 - digit;
+			inPos++;
+			c = peek();
+		}
+		return negative ? value : -value;
+	}
+
+	// consumes rest of line, returns true if it contains only spaces
+	private static boolean endOfLine() {
+		int c = skipSpaces(false);
+		if(c == -1 || c == '\n') {
+			skipLine();
+			return true;
+		}
+		skipLine();
+		return false;
+	}
+
+	private static void skipLine() {
+		int c = peek();
+		while(c != -1 && c != '\n') {
+			inPos++;
+			c = peek();
+		}
+		if(c == '\n') {
+			inPos++;
+		}
+	}
+
+	// skips spaces (and line breaks if skipLines), returns next char or -1 at end of input
+	private static int skipSpaces(boolean skipLines) {
+		int c = peek();
+		while(c == ' ' || c == '\t' || c == '\r' || (skipLines && c == '\n')) {
+			inPos++;
+			c = peek();
+		}
+		return c;
+	}
+
+	private static boolean isDigit(int c) {
+		return c >= '0' && c <= '9';
+	}
+
+	private static boolean isNumberStart(int c) {
+		return c == '-' || isDigit(c);
+	}
+
+	// returns current char without consuming it or -1 at end of input
+	private static int peek() {
+		if(inPos == inLength && !fill()) {
+			return -1;
+		}
+		return inBuffer[inPos] & 0xff;
+	}
+
+	private static boolean fill() {
+		// program output must be visible before blocking on input
+		flush();
+		inPos = 0;
+		inLength = 0;
+		try {
+			int length = in.read(inBuffer);
+			if(length > 0) {
+				inLength = length;
+			}
+		} catch (IOException e) {
+			e.printStackTrace();
+		}
+		return inLength > 0;
+	}
+}
@@ -1,104 +1,219 @@
 package listlang.objects;
 
-import java.io.BufferedReader;
-import java.io.IOException;
-import java.io.InputStreamReader;
-import java.util.regex.Matcher;
-import java.util.regex.Pattern;
-
-import java.util.LinkedList;
-
 public class List {
 
-	static final Pattern listPattern = Pattern.compile(" *\\[ *\\d+(, *\\d+ *)* *\\] *");
-	static final Pattern numberPattern = Pattern.compile("\\d+");
+	static final int MIN_CAPACITY = 8;
+	// largest power of two which is a valid array size
+	static final int MAX_CAPACITY = 1 << 30;
 
 	public static List read() {
 		List readedList = new List();
-		
-		// read line from stdin
-		BufferedReader bufferedreader = new BufferedReader(new InputStreamReader(System.in)); 
-		String line = "";
-		try {
-			line = bufferedreader.readLine();
-		} catch (IOException e) {
-			e.printStackTrace();
-		}
-		
-		// parse readed line
-		Matcher listMatcher = listPattern.matcher(line);
-		if(listMatcher.matches()) {
-			Matcher numberMatcher = numberPattern.matcher(line);
-
-			while (numberMatcher.find()) {
-				readedList.addLast(Integer.parseInt(numberMatcher.group()));
-			}
+		if(!IO.readList(readedList)) {
+			return new List();
 		}
-		
 		return readedList;
 	}
 	
-	private LinkedList<Integer> mList = new LinkedList<Integer>();
+	// ring buffer: elements are mData[(mHead + i) & (mData.length - 1)], i < mSize
+	// capacity of mData is always a power of two
+	private int[] mData;
+	private int mHead = 0;
+	private int mSize = 0;
+	// copy-on-write: mData may be referenced by other lists and must be
+	// copied before the first write into it
+	private boolean mShared = false;
 	
 	public List() {
+		mData = newData(MIN_CAPACITY);
+		if(Counters.enabled) {
+			Counters.operation(Counters.NEW, 0);
+		}
 	}
 	
-	public void print() {		
-		String str = "";
-		if(!mList.isEmpty()) {
-			str = mList.get(0).toString();
-			for(int i = 1; i < mList.size(); i++) {
-				str += ", " + mList.get(i).toString();
+	public List(int[] values) {
+		mData = newData(capacityFor(values.length));
+		System.arraycopy(values, 0, mData, 0, values.length);
+		mSize = values.length;
+		if(Counters.enabled) {
+			Counters.operation(Counters.NEW, values.length);
+		}
+	}
+	
+	// every backing array is made here, so instrumented programs count allocations
+	private static int[] newData(int capacity) {
+		if(Counters.enabled) {
+			Counters.allocation(capacity);
+		}
+		return new int[capacity];
+	}
+	
+	// fills array from offset with comma separated values, used for constant list literals
+	public static int[] fillConstant(int[] array, String values, int offset) {
+		int value = 0;
+		boolean negative = false;
+		for(int i = 0; i < values.length(); i++) {
+			char c = values.charAt(i);
+			if(c == ',') {
+				array[offset++] = negative ? -value : value;
+				value = 0;
+				negative = false;
+			} else if(c == '-') {
+				negative = true;
+			} else {
+				value = value * 10 + (c - '0');
 			}
 		}
-		System.out.print("[" + str + "]");
+		array[offset] = negative ? -value : value;
+		return array;
+	}
+	
+	// size is long, so sums and products of sizes over int range fail here instead of wrapping around
+	private static int capacityFor(long size) {
+		if(size > MAX_CAPACITY) {
+			throw new OutOfMemoryError("List size " + size + " is over maximum " + MAX_CAPACITY);
+		}
+		int capacity = MIN_CAPACITY;
+		while(capacity < size) {
+			capacity <<= 1;
+		}
+		return capacity;
+	}
+	
+	private int index(int i) {
+		return (mHead + i) & (mData.length - 1);
+	}
+	
+	private void grow() {
+		if(Counters.enabled) {
+			Counters.operation(Counters.GROW, mSize);
+		}
+		reallocate(capacityFor((long) mData.length << 1));
+	}
+	
+	private void reallocate(int capacity) {
+		int[] data = newData(capacity);
+		copyTo(data, 0);
+		mData = data;
+		mHead = 0;
+		mShared = false;
+	}
+	
+	// must be called before every write into mData
+	private void prepareWrite(int newSize) {
+		if(mShared) {
+			if(Counters.enabled) {
+				Counters.operation(Counters.COPY_ON_WRITE, mSize);
+			}
+			// a view may reference a much bigger array, so size the copy by own length
+			reallocate(capacityFor(newSize));
+		} else if(newSize > mData.length) {
+			grow();
+		}
+	}
+	
+	// copies elements in list order to dest starting at destPos
+	private void copyTo(int[] dest, int destPos) {
+		int firstPart = Math.min(mSize, mData.length - mHead);
+		System.arraycopy(mData, mHead, dest, destPos, firstPart);
+		System.arraycopy(mData, 0, dest, destPos + firstPart, mSize - firstPart);
+	}
+	
+	public int[] toArray() {
+		int[] values = newData(mSize);
+		copyTo(values, 0);
+		return values;
+	}
+	
+	public void print() {
+		IO.print('[');
+		for(int i = 0; i < mSize; i++) {
+			if(i > 0) {
+				IO.print(',');
+				IO.print(' ');
+			}
+			IO.print(mData[index(i)]);
+		}
+		IO.print(']');
 	}
 	
 	public int count(int n) {
 		int n_count = 0;
-		for(int val : mList) {
-			if(val == n) {
+		for(int i = 0; i < mSize; i++) {
+			if(mData[index(i)] == n) {
 				n_count++;
 			}
 		}
 		return n_count;
 	}
 	
-	@SuppressWarnings("unchecked")
-	public List(LinkedList<Integer> linkedList) {
-		mList = (LinkedList<Integer>) linkedList.clone();
+	// data length must be a power of two
+	private List(int[] data, int head, int size, boolean shared) {
+		mData = data;
+		mHead = head;
+		mSize = size;
+		mShared = shared;
 	}
 	
 	public List clone() {
-		return new List(this.getLinkedList());
-	}
-	
-	public LinkedList<Integer> getLinkedList() {
-		return mList;
+		if(Counters.enabled) {
+			Counters.operation(Counters.CLONE, 0);
+		}
+		mShared = true;
+		return new List(mData, mHead, mSize, true);
 	}
 	
 	public void addFirst(int n) {
-		mList.addFirst(new Integer(n));
+		prepareWrite(mSize + 1);
+		mHead = (mHead - 1) & (mData.length - 1);
+		mData[mHead] = n;
+		mSize++;
 	}
 	
 	public void addLast(int n) {
-		mList.addLast(new Integer(n));
+		prepareWrite(mSize + 1);
+		mData[index(mSize)] = n;
+		mSize++;
 	}
 	
+	// removeFirst and removeLast only move bounds and never write into mData,
+	// so they are safe on shared storage
 	public void removeFirst() {
-		mList.remove(0);
+		checkIndex(0);
+		mHead = index(1);
+		mSize--;
 	}
 	
 	public void removeLast() {
-		mList.remove(mList.size() - 1);
+		checkIndex(0);
+		mSize--;
 	}
 	
 	public void delete(int i) {
-		mList.remove(i);
+		checkIndex(i);
+		prepareWrite(mSize);
+		if(i < mSize / 2) {
+			// shift head part one step right
+			for(int j = i; j > 0; j--) {
+				mData[index(j)] = mData[index(j - 1)];
+			}
+			mHead = index(1);
+		} else {
+			// shift tail part one step left
+			for(int j = i; j < mSize - 1; j++) {
+				mData[index(j)] = mData[index(j + 1)];
+			}
+		}
+		mSize--;
+	}
+	
+	private void checkIndex(int i) {
+		if(i < 0 || i >= mSize) {
+			throw new IndexOutOfBoundsException("Index: " + i + ", Size: " + mSize);
+		}
 	}
 	
 	public boolean boolean_value() {
-		return !mList.isEmpty();
+		return mSize != 0;
 	}
 	
 	public int to_int() {
@@ -108,59 +223,143 @@ public class List {
 	// expressions
 	
 	public int get(int i) {
-		return mList.get(i).intValue();
+		checkIndex(i);
+		return mData[index(i)];
 	}
 	
+	// O(1) view sharing the backing array, copied on the first write
 	public List slice(int begin, int end) {
-		LinkedList<Integer> slicingLinkedList = this.getLinkedList();
-		for(int i = slicingLinkedList.size() - end; i > 0; i--) {
-			slicingLinkedList.remove(end);
+		int length = rangeLength(begin, end);
+		if(Counters.enabled) {
+			Counters.operation(Counters.SLICE, 0);
 		}
-		for(int i = 0; i < begin; i++) {
-			slicingLinkedList.remove(0);
+		mShared = true;
+		return new List(mData, index(begin), length, true);
+	}
+	
+	// number of elements in l[begin:end], checks bounds the same way as slice
+	public int rangeLength(int begin, int end) {
+		end = Math.min(end, mSize);
+		if(begin < 0 || begin > end) {
+			throw new IndexOutOfBoundsException("Slice: [" + begin + ":" + end + "], Size: " + mSize);
 		}
-		return new List(slicingLinkedList);
+		return end - begin;
+	}
+	
+	// direct reading for "for" loops over l[begin:end]: element i of the list is
+	// at(pin(), position(i)), array is marked shared so it is never written after pin()
+	public int[] pin() {
+		mShared = true;
+		return mData;
+	}
+	
+	public int position(int i) {
+		return mHead + i;
+	}
+	
+	public static int at(int[] data, int position) {
+		return data[position & (data.length - 1)];
+	}
+	
+	// iteration protocol of "for" loops: cursor is an O(1) snapshot of the list,
+	// so changes of the list inside loop body don't affect iteration
+	public List cursor() {
+		return clone();
+	}
+	
+	// returns first element of cursor and moves cursor to the next one
+	public int next() {
+		checkIndex(0);
+		int value = mData[mHead];
+		mHead = index(1);
+		mSize--;
+		return value;
 	}
 	
 	public int len() {
-		return mList.size();
+		return mSize;
 	}
 
 	public int equal(List second) {
-		if(second.getLinkedList().equals(mList)) {
-			return 1;
-		} else {
+		if(second.len() != mSize) {
 			return 0;
 		}
+		for(int i = 0; i < mSize; i++) {
+			if(second.get(i) != mData[index(i)]) {
+				return 0;
+			}
+		}
+		return 1;
 	}
 	
 	public List concat(List second) {
-		List resList = this.clone();
-		for(int i = 0; i < second.len(); i++) {
-			resList.addLast(second.get(i));
+		if(Counters.enabled) {
+			Counters.operation(Counters.CONCAT, mSize + second.mSize);
 		}
+		List resList = withCapacity(mSize + second.mSize);
+		resList.append(this);
+		resList.append(second);
 		return resList;
 	}
 	
+	// empty list which takes size elements without reallocation, used for concatenation chains
+	public static List withCapacity(int size) {
+		return new List(newData(capacityFor(size)), 0, 0, false);
+	}
+	
+	public void appendAll(List second) {
+		if(Counters.enabled) {
+			Counters.operation(Counters.APPEND_ALL, second.mSize);
+		}
+		append(second);
+	}
+	
+	private void append(List second) {
+		long size = (long) mSize + second.mSize;
+		if(mShared || mHead + size > mData.length) {
+			if(Counters.enabled) {
+				Counters.operation(mShared ? Counters.COPY_ON_WRITE : Counters.GROW, mSize);
+			}
+			// one reallocation makes free space after elements contiguous
+			reallocate(capacityFor(size));
+		}
+		second.copyTo(mData, mHead + mSize);
+		mSize = (int) size;
+	}
+	
 	public List multiply(int times) {
-		List result = this;
-		for(int i = 1; i < times; i++) {
-			result = result.concat(this);
+		// like repeated concatenation, times <= 1 gives this list itself, not a copy
+		if(times <= 1) {
+			return this;
 		}
-		return result;
+		long longSize = (long) mSize * times;
+		int capacity = capacityFor(longSize);
+		int size = (int) longSize;
+		if(Counters.enabled) {
+			Counters.operation(Counters.MULTIPLY, size);
+		}
+		int[] data = newData(capacity);
+		copyTo(data, 0);
+		// double the filled part until it covers the result
+		for(int filled = mSize; filled < size; filled *= 2) {
+			System.arraycopy(data, 0, data, filled, Math.min(filled, size - filled));
+		}
+		return new List(data, 0, size, false);
 	}
 	
 	public List removeEvery(int n) {
-		List result = clone();
-		int i = 0;
-		while(i < result.len()) {
-			if(result.get(i) == n) {
-				result.delete(i);
-			} else {
-				i++;
+		int[] data = newData(capacityFor(mSize));
+		int size = 0;
+		for(int i = 0; i < mSize; i++) {
+			int value = mData[index(i)];
+			if(value != n) {
+				data[size++] = value;
 			}
 		}
-		return result;
+		if(Counters.enabled) {
+			Counters.operation(Counters.REMOVE_EVERY, size);
+		}
+		return new List(data, 0, size, false);
 	}
 
 	public List pre_incr() {
@@ -23,11 +23,12 @@ tokens {
 
 @members {
 	
+	# recognizers add errors to self.errors (error_processor.Errors), it's set by compiler for every compile
 	def lexerReportError(self, e):
 		line = e.line
 		position_in_line = e.charPositionInLine
 		msg = self.getErrorMessage(e, self.tokenNames)
-		error_processor.add_error(error_processor.LEXICAL, line, position_in_line, msg)
+		self.errors.add_error(error_processor.LEXICAL, line, position_in_line, msg)
 		
 		antlr3.BaseRecognizer.reportError(self, e)
 
@@ -35,7 +36,7 @@ tokens {
 		line = e.line
 		position_in_line = e.charPositionInLine
 		msg = self.getErrorMessage(e, self.tokenNames)
-		error_processor.add_error(error_processor.SYNTAX, line, position_in_line, msg)
+		self.errors.add_error(error_processor.SYNTAX, line, position_in_line, msg)
 		
 		antlr3.BaseRecognizer.reportError(self, e)
 	
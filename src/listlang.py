@@ -1,19 +1,33 @@
 #!/usr/bin/env python
 # -*- coding: utf-8 -*-
-from llcompiler import error_processor, ListLangParser, ListLangWalker, ListLangLexer
+from llcompiler import ll_compiler, ll_cache, ll_protocol, ll_profile, jclassfile
 
 __author__ = 'Oleg Beloglazov'
 
 
 import sys
 import os
+import copy
+import json
+import time
+import hashlib
+import socket
+import SocketServer
 import argparse
 import subprocess
 import shutil
 import zipfile
+import tempfile
+import traceback
+import StringIO
+import multiprocessing
 
-import antlr3
-import antlr3.tree
+
+JAR_COMPRESSIONS = {'stored': zipfile.ZIP_STORED, 'deflated': zipfile.ZIP_DEFLATED}
+JAR_MANIFEST_NAME = 'META-INF/MANIFEST.MF'
+JAR_ENTRY_TIME = (1980, 1, 1, 0, 0, 0)
+
+runtime_files_cache = {}    # {adds directory: [(name in jar, bytes)]}
 
 
 def tokens_out(tokens, tokens_filename):
@@ -31,45 +45,33 @@ def tokens_out(tokens, tokens_filename):
     tokens_file.close()
 
 
-def make_jasmin_file(src_filename, dest_filename, tokens_filename=''):
-    # Run lexer
-    char_stream = antlr3.ANTLRFileStream(src_filename, encoding='utf8')
-    lexer = ListLangLexer.ListLangLexer(char_stream)
-    tokens = antlr3.CommonTokenStream(lexer)
+def compile_source_file(src_filename, tokens_filename='', opt_level=1, tail_calls=True, assemble=True,
+                        profile=False, instrument=False):
+    """ Returns ll_compiler.CompileResult, raises ll_compiler.CompileError if source has errors """
+    with open(src_filename, 'rb') as src_file:
+        source = src_file.read()
+    options = ll_compiler.CompileOptions(
+        opt_level=opt_level, tail_calls=tail_calls, assemble=assemble, keep_tokens=bool(tokens_filename),
+        profile=profile, instrument=instrument
+    )
+    result = ll_compiler.compile(source, options)
 
     if tokens_filename:
-        tokens_out(tokens.getTokens(), tokens_filename)
+        tokens_out(result.tokens, tokens_filename)
 
-    # Get AST tree
-    parser = ListLangParser.ListLangParser(tokens)
-    ast = parser.program().tree
+    if not result.success:
+        raise ll_compiler.CompileError(result)
+    return result
 
-    #print ast.toStringTree()
-
-    errors = error_processor.get_all_errors()
-    if errors:
-        sys.stderr.write('\n'.join(errors))
-        sys.exit(1)
 
-    nodes = antlr3.tree.CommonTreeNodeStream(ast)
-    nodes.setTokenStream(tokens)
-
-    walker = ListLangWalker.ListLangWalker(nodes)
-
-    try:
-        target_code = walker.program()
-    except error_processor.SemanticException as e:
-        error_processor.add_error(error_processor.SEMANTIC, e.line, e.pos_in_line, e.message)
-
-    errors = error_processor.get_all_errors()
-    if errors:
-        sys.stderr.write('\n'.join(errors))
-        sys.exit(1)
-
-    if target_code:
-        target_file = open(dest_filename, 'w')
-        target_file.write(target_code)
-        target_file.close()
+def make_jasmin_file(src_filename, dest_filename, tokens_filename='', opt_level=1, tail_calls=True,
+                     instrument=False):
+    result = compile_source_file(src_filename, tokens_filename, opt_level, tail_calls, assemble=False,
+                                 instrument=instrument)
+    target_file = open(dest_filename, 'w')
+    target_file.write(result.jasmin_code)
+    target_file.close()
+    return result.jasmin_code
 
 
 def get_dir_files_paths(dir_path, recursive=False):
@@ -88,49 +90,371 @@ def get_dir_files_paths(dir_path, recursive=False):
     return files_paths
 
 
+def compiler_version():
+    """ Hash of compiler sources and runtime files put to jar (see get_runtime_files), it's computed by main
+    at start, so compile server keeps version of compiler modules it has loaded """
+    compiler_dir = os.path.dirname(os.path.abspath(__file__))
+    llcompiler_paths = [path for path in get_dir_files_paths(os.path.join(compiler_dir, 'llcompiler'))
+                        if path.endswith('.py')]
+    digest = hashlib.sha1(ll_cache.files_hash([os.path.abspath(__file__)] + llcompiler_paths))
+    for name, data in get_runtime_files():
+        digest.update(name)
+        digest.update(data)
+    return digest.hexdigest()
+
+
 def cmd(args):
+    """ Runs shell command, returns (exit status, output) """
     try:
-        output = subprocess.check_output(args, stderr=subprocess.STDOUT, shell=True)
+        return 0, subprocess.check_output(args, stderr=subprocess.STDOUT, shell=True)
     except subprocess.CalledProcessError as e:
-        output = e.output
-    return output
-
+        return e.returncode, e.output
+
+
+def get_runtime_files(adds_dir='adds'):
+    """ Returns [(name in jar, bytes)] of runtime classes and manifest, they are read once by process """
+    if adds_dir not in runtime_files_cache:
+        files = []
+        for path in get_dir_files_paths(adds_dir, recursive=True):
+            with open(path, 'rb') as runtime_file:
+                files.append((os.path.relpath(path, adds_dir).replace(os.sep, '/'), runtime_file.read()))
+        runtime_files_cache[adds_dir] = files
+    return runtime_files_cache[adds_dir]
+
+
+def make_jar(classes, compression=zipfile.ZIP_STORED):
+    """ Returns bytes of jar with runtime files and classes [(class name, class bytes)] """
+    entries = get_runtime_files() + [(class_name + '.class', class_bytes) for class_name, class_bytes in classes]
+    # manifest is the first entry of jar, other entries keep their order
+    entries.sort(key=lambda entry: entry[0] != JAR_MANIFEST_NAME)
+
+    jar_buffer = StringIO.StringIO()
+    jar = zipfile.ZipFile(jar_buffer, mode='w', compression=compression)
+    for name, data in entries:
+        # fixed time makes jars of the same program equal
+        entry_info = zipfile.ZipInfo(name, JAR_ENTRY_TIME)
+        entry_info.compress_type = compression
+        jar.writestr(entry_info, data)
+    jar.close()
+    return jar_buffer.getvalue()
+
+
+def assemble_with_jasmin(src_filename, jasmin_filename, args):
+    """ Makes Jasmin file and assembles it with jasmin.jar, returns [(class name, class bytes)] """
+    make_jasmin_file(src_filename, jasmin_filename, args.tokens_filename, args.opt_level, args.tail_calls,
+                     args.instrument)
+    output_dir = tempfile.mkdtemp(prefix='lljasmin')
+    try:
+        status, output = cmd(r'java -jar jasmin.jar -d "%s" "%s"' % (output_dir, jasmin_filename))
+        classes = []
+        for path in get_dir_files_paths(output_dir, recursive=True):
+            if path.endswith('.class'):
+                class_name = os.path.splitext(os.path.relpath(path, output_dir))[0].replace(os.sep, '/')
+                with open(path, 'rb') as class_file:
+                    classes.append((class_name, class_file.read()))
+        # Jasmin reports some errors without exit status, then it makes no class file
+        if status != 0 or not classes:
+            raise jclassfile.AssemblerError('jasmin.jar exited with status %i and made %i class files:\n%s' % (
+                status, len(classes), output.strip()
+            ))
+    finally:
+        shutil.rmtree(output_dir, ignore_errors=True)
+    return classes
+
+
+def compile_file(src_filename, dest_filename, args, cache=None, progress=True):
+    """ Compiles source to jar file, jar is made in memory, so compiles can run at the same time,
+    args - parsed command line options, progress - print progress messages (compile server doesn't print them),
+    returns ll_profile.Profile if args.profile else None """
+    # tokens file and profile are made only by real compile
+    if cache and not args.tokens_filename and not args.profile:
+        with open(src_filename, 'rb') as src_file:
+            source = src_file.read()
+        cache_key = cache.make_key(
+            source, args.compiler_version,
+            [args.opt_level, args.tail_calls, args.backend, args.jar_compression, args.instrument]
+        )
+        if cache.get(cache_key, dest_filename):
+            if progress:
+                print 'jar file is taken from cache'
+            return None
+    else:
+        cache = None
+
+    profile = None
+    if args.backend == 'jasmin':
+        # Jasmin file is kept next to jar for debugging
+        jasmin_filename = os.path.splitext(dest_filename)[0] + '.j'
+        classes = assemble_with_jasmin(src_filename, jasmin_filename, args)
+    else:
+        result = compile_source_file(src_filename, args.tokens_filename, args.opt_level, args.tail_calls,
+                                     profile=args.profile, instrument=args.instrument)
+        classes = [(result.class_name, result.class_bytes)]
+        profile = result.profile
+
+    if progress:
+        print 'creating jar file'
+    with (profile or ll_profile.NullProfile()).phase('jar'):
+        jar_bytes = make_jar(classes, JAR_COMPRESSIONS[args.jar_compression])
+        with open(dest_filename, 'wb') as jar_file:
+            jar_file.write(jar_bytes)
+    if profile:
+        profile.count('jar_bytes', len(jar_bytes))
+
+    if cache:
+        cache.put(cache_key, dest_filename)
+    return profile
+
+
+def write_profiles_json(profiles, json_filename, version):
+    """ profiles - {src_filename: ll_profile.Profile}, compiler version lets to compare runs of one compiler """
+    report = {
+        'compiler_version': version,
+        'time': time.time(),
+        'files': dict((src_filename, profile.as_dict()) for src_filename, profile in profiles.items()),
+    }
+    with open(json_filename, 'w') as json_file:
+        json.dump(report, json_file, indent=2, sort_keys=True)
+
+
+def make_cache(args):
+    if not args.use_cache:
+        return None
+    return ll_cache.CompileCache(args.cache_dir, args.cache_size * 1024 * 1024)
+
+
+def compile_job(job):
+    """ Compiles one file of batch in pool process, returns (src_filename, error, time, cache counters, profile) """
+    src_filename, dest_filename, args = job
+    start = time.time()
+    cache = make_cache(args)
+
+    error = None
+    profile = None
+    try:
+        # progress messages of jobs would be mixed
+        profile = compile_file(src_filename, dest_filename, args, cache, progress=False)
+    except ll_compiler.CompileError as e:
+        error = str(e)
+    except Exception:
+        error = traceback.format_exc()
+
+    cache_counters = (cache.hits, cache.misses, cache.evictions) if cache else (0, 0, 0)
+    return src_filename, error, time.time() - start, cache_counters, profile
+
+
+def get_batch_jobs(paths, out_dir, args):
+    """ Returns [(src_filename, dest_filename, args)] for source files and directories with them,
+    jars of directory sources keep their relative paths """
+    jobs = []
+    for path in paths:
+        if os.path.isdir(path):
+            src_filenames = [src for src in get_dir_files_paths(path, recursive=True) if src.endswith('.ll')]
+            base_dir = path
+        else:
+            src_filenames = [path]
+            base_dir = os.path.dirname(path)
+        for src_filename in sorted(src_filenames):
+            relative_path = os.path.relpath(src_filename, base_dir)
+            dest_filename = os.path.join(out_dir, os.path.splitext(relative_path)[0] + '.jar')
+            jobs.append((src_filename, dest_filename, args))
+    return jobs
+
+
+def compile_batch(paths, out_dir, args):
+    """ Compiles many sources in process pool, prints summary, returns number of failed compiles """
+    jobs = get_batch_jobs(paths, out_dir, args)
+    for src_filename, dest_filename, job_args in jobs:
+        if not os.path.exists(os.path.dirname(dest_filename)):
+            os.makedirs(os.path.dirname(dest_filename))
+
+    start = time.time()
+    pool = multiprocessing.Pool(args.jobs)
+    results = []
+    try:
+        for result in pool.imap_unordered(compile_job, jobs):
+            src_filename, error, elapsed, cache_counters, profile = result
+            print '%-6s %7.3fs %s' % ('FAILED' if error else 'ok', elapsed, src_filename)
+            results.append(result)
+    finally:
+        pool.close()
+        pool.join()
+    wall_time = time.time() - start
+
+    failed = [(result[0], result[1]) for result in results if result[1]]
+    for src_filename, error in failed:
+        print '\n%s:\n%s' % (src_filename, error.strip())
+
+    print '\n%i compiled, %i failed, %.3fs wall time, %.3fs compile time' % (
+        len(results) - len(failed), len(failed), wall_time, sum(result[2] for result in results)
+    )
+    slowest = sorted(results, key=lambda result: result[2], reverse=True)[:5]
+    print 'slowest: %s' % ', '.join('%s (%.3fs)' % (result[0], result[2]) for result in slowest)
+    if args.verbose and args.use_cache:
+        hits, misses, evictions = [sum(counters) for counters in zip(*[result[3] for result in results])] or (0, 0, 0)
+        print 'cache: %i hits, %i misses, %i evicted' % (hits, misses, evictions)
+
+    profiles = dict((result[0], result[4]) for result in results if result[4])
+    if args.profile_tables:
+        for src_filename in sorted(profiles):
+            print '\n%s:\n%s' % (src_filename, profiles[src_filename].format_table())
+    if args.profile_json:
+        write_profiles_json(profiles, args.profile_json, args.compiler_version)
+    return len(failed)
+
+
+def serve_compile(header, source, server_args):
+    """ Compiles request of compile server client, returns (response header, jar bytes) """
+    args = copy.copy(server_args)
+    args.opt_level = header.get('opt_level', 1)
+    args.tail_calls = header.get('tail_calls', True)
+    args.backend = header.get('backend', 'classfile')
+    args.jar_compression = header.get('jar_compression', 'stored')
+    args.instrument = header.get('instrument', False)
+    args.use_cache = server_args.use_cache and header.get('use_cache', True)
+    args.profile = False
+
+    job_dir = tempfile.mkdtemp(prefix='llserve')
+    src_filename = os.path.join(job_dir, 'source.ll')
+    dest_filename = os.path.join(job_dir, 'target.jar')
+    args.tokens_filename = os.path.join(job_dir, 'tokens.txt') if header.get('tokens') else None
+    with open(src_filename, 'wb') as src_file:
+        src_file.write(source)
+
+    response = {'status': 'ok', 'errors': [], 'tokens': None}
+    jar_bytes = ''
+    try:
+        compile_file(src_filename, dest_filename, args, make_cache(args), progress=False)
+        with open(dest_filename, 'rb') as jar_file:
+            jar_bytes = jar_file.read()
+    except ll_compiler.CompileError as e:
+        response['status'] = 'error'
+        response['errors'] = e.result.errors
+    except Exception:
+        response['status'] = 'error'
+        response['errors'] = [traceback.format_exc()]
+    finally:
+        if args.tokens_filename and os.path.exists(args.tokens_filename):
+            with open(args.tokens_filename) as tokens_file:
+                response['tokens'] = tokens_file.read()
+        shutil.rmtree(job_dir, ignore_errors=True)
+    return response, jar_bytes
+
+
+class CompileRequestHandler(SocketServer.BaseRequestHandler):
+
+    def handle(self):
+        try:
+            header, source = ll_protocol.receive_message(self.request)
+        except ll_protocol.ProtocolError:
+            return
+        response, jar_bytes = serve_compile(header, source, self.server.args)
+        ll_protocol.send_message(self.request, response, jar_bytes)
+
+
+def serve(socket_path, args):
+    """ Compiles requests of clients (llclient.py) on Unix socket until interrupted,
+    compiler modules stay imported between compiles """
+    if not hasattr(socket, 'AF_UNIX'):
+        sys.exit('compile server needs Unix sockets')
+
+    class CompileServer(SocketServer.ThreadingMixIn, SocketServer.UnixStreamServer):
+        daemon_threads = True
+
+    if os.path.exists(socket_path):
+        os.remove(socket_path)
+    if os.path.dirname(socket_path) and not os.path.exists(os.path.dirname(socket_path)):
+        os.makedirs(os.path.dirname(socket_path))
+
+    server = CompileServer(socket_path, CompileRequestHandler)
+    server.args = args
+    print 'compile server is listening on %s' % socket_path
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        os.remove(socket_path)
 
-def zipfile_add_directory(zip_file, target_dir):
-    rootlen = len(target_dir)
-    for base, dirs, files in os.walk(target_dir):
-        for file in files:
-            fn = os.path.join(base, file)
-            zip_file.write(fn, fn[rootlen:])
 
 def main():
     # Parse command line arguments
     args_parser = argparse.ArgumentParser(description='Compile listlang source files.')
-    args_parser.add_argument('src_filename', type=str, help='path to source file')
-    args_parser.add_argument('dest_filename', type=str, help='path to output compiled file')
+    args_parser.add_argument('src_filename', type=str, nargs='?', help='path to source file')
+    args_parser.add_argument('dest_filename', type=str, nargs='?', help='path to output compiled file')
     args_parser.add_argument('--tokens', '-t', dest='tokens_filename', help='get file with tokens')
+    args_parser.add_argument('--opt-level', '-O', dest='opt_level', type=int, choices=[0, 1], default=1,
+                             help='optimization level: 0 - none, 1 (default) - peephole optimizer, index loops '
+                                  'over slices, one list for chains of concatenations, no prologue clones of '
+                                  'List params which are never mutated')
+    args_parser.add_argument('--no-tail-calls', dest='tail_calls', action='store_false',
+                             help="don't replace self tail calls with jumps (keeps every call in stack trace)")
+    args_parser.add_argument('--backend', '-b', dest='backend', choices=['classfile', 'jasmin'], default='classfile',
+                             help='classfile - write class file directly (default), '
+                                  'jasmin - assemble with jasmin.jar, source is kept next to jar for debugging')
+    args_parser.add_argument('--instrument', dest='instrument', action='store_true',
+                             help='make program count calls of functions, loop iterations and list copies, '
+                                  'counters are written on exit to file of listlang.counters java property '
+                                  '(default: listlang-counters.json)')
+    args_parser.add_argument('--jar-compression', dest='jar_compression', choices=sorted(JAR_COMPRESSIONS),
+                             default='stored', help='compression of jar entries (default: stored)')
+    args_parser.add_argument('--no-cache', dest='use_cache', action='store_false',
+                             help="don't take compiled jar from cache and don't put it there")
+    args_parser.add_argument('--cache-dir', dest='cache_dir', default='tmp/cache/', help='directory of cache')
+    args_parser.add_argument('--cache-size', dest='cache_size', type=int, default=256,
+                             help='max size of cache in megabytes (default: 256)')
+    args_parser.add_argument('--verbose', '-v', dest='verbose', action='store_true', help='print cache statistics')
+    args_parser.add_argument('--profile', dest='profile_tables', action='store_true',
+                             help='print time, CPU time and process peak RSS so far of compile phases '
+                                  'and sizes of program')
+    args_parser.add_argument('--profile-json', dest='profile_json', metavar='FILE',
+                             help='write profile of compiled files to JSON file')
+    args_parser.add_argument('--batch', dest='batch_paths', nargs='+', metavar='SRC',
+                             help='compile many source files or directories with them instead of src_filename')
+    args_parser.add_argument('--out-dir', '-o', dest='out_dir', default='tmp/jars/',
+                             help='directory for jar files of batch (default: tmp/jars/)')
+    args_parser.add_argument('--jobs', '-j', dest='jobs', type=int, default=multiprocessing.cpu_count(),
+                             help='number of processes compiling batch (default: number of CPUs)')
+    args_parser.add_argument('--serve', dest='serve', action='store_true',
+                             help='run compile server for llclient.py instead of compiling')
+    args_parser.add_argument('--socket', dest='socket_path', default=ll_protocol.DEFAULT_SOCKET_PATH,
+                             help='Unix socket of compile server (default: %s)' % ll_protocol.DEFAULT_SOCKET_PATH)
     args = args_parser.parse_args()
-
-    BUILDING_DIR = 'tmp/lljar/'
-    JFILENAME = BUILDING_DIR + 'target.j'
-
-    # prepare building directory
-    if os.path.exists(BUILDING_DIR):
-        shutil.rmtree(BUILDING_DIR)
-    shutil.copytree('adds', BUILDING_DIR)
-
-    # make target file with jasmin code
-    make_jasmin_file(args.src_filename, JFILENAME, args.tokens_filename)
-
-    # compile jasmin file
-    cmd(r'java -jar jasmin.jar -d %s %s' % (BUILDING_DIR, JFILENAME))
-    os.remove(JFILENAME)
-
-    # make jar file
-    print 'creating jar file'
-    zf = zipfile.ZipFile(args.dest_filename, mode='w')
-    zipfile_add_directory(zf, BUILDING_DIR)
-    zf.close()
+    args.profile = args.profile_tables or bool(args.profile_json)
+    if args.profile and args.backend == 'jasmin':
+        args_parser.error('--profile and --profile-json are used with classfile backend')
+    # jobs of batch and server get it with args
+    args.compiler_version = compiler_version()
+
+    if args.serve:
+        if args.src_filename or args.batch_paths:
+            args_parser.error('--serve is used without sources')
+        serve(args.socket_path, args)
+        return
+
+    if args.batch_paths:
+        if args.src_filename or args.tokens_filename:
+            args_parser.error('--batch is used without src_filename, dest_filename and --tokens')
+        if compile_batch(args.batch_paths, args.out_dir, args):
+            sys.exit(1)
+        return
+
+    if not args.dest_filename:
+        args_parser.error('src_filename and dest_filename are required')
+
+    cache = make_cache(args)
+    try:
+        profile = compile_file(args.src_filename, args.dest_filename, args, cache)
+    except ll_compiler.CompileError as e:
+        sys.stderr.write(str(e))
+        sys.exit(1)
+    if cache and args.verbose:
+        print cache.stats()
+    if args.profile_tables:
+        print profile.format_table()
+    if args.profile_json:
+        write_profiles_json({args.src_filename: profile}, args.profile_json, args.compiler_version)
 
 
 if __name__ == "__main__":
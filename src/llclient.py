@@ -0,0 +1,73 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+""" Client of compile server (listlang.py --serve), it takes the same arguments as listlang.py,
+but doesn't import the compiler, so it starts fast """
+
+import sys
+import socket
+import argparse
+
+from llcompiler import ll_protocol
+
+
+def main():
+    args_parser = argparse.ArgumentParser(description='Compile listlang source file with compile server.')
+    args_parser.add_argument('src_filename', type=str, help='path to source file')
+    args_parser.add_argument('dest_filename', type=str, help='path to output compiled file')
+    args_parser.add_argument('--tokens', '-t', dest='tokens_filename', help='get file with tokens')
+    args_parser.add_argument('--opt-level', '-O', dest='opt_level', type=int, choices=[0, 1], default=1,
+                             help='optimization level: 0 - none, 1 (default) - peephole optimizer, index loops '
+                                  'over slices, one list for chains of concatenations, no prologue clones of '
+                                  'List params which are never mutated')
+    args_parser.add_argument('--no-tail-calls', dest='tail_calls', action='store_false',
+                             help="don't replace self tail calls with jumps (keeps every call in stack trace)")
+    args_parser.add_argument('--backend', '-b', dest='backend', choices=['classfile', 'jasmin'], default='classfile',
+                             help='classfile - write class file directly (default), jasmin - assemble with jasmin.jar')
+    args_parser.add_argument('--instrument', dest='instrument', action='store_true',
+                             help='make program count calls of functions, loop iterations and list copies')
+    args_parser.add_argument('--jar-compression', dest='jar_compression', choices=['deflated', 'stored'],
+                             default='stored', help='compression of jar entries (default: stored)')
+    args_parser.add_argument('--no-cache', dest='use_cache', action='store_false',
+                             help="don't take compiled jar from cache of server and don't put it there")
+    args_parser.add_argument('--socket', dest='socket_path', default=ll_protocol.DEFAULT_SOCKET_PATH,
+                             help='Unix socket of compile server (default: %s)' % ll_protocol.DEFAULT_SOCKET_PATH)
+    args = args_parser.parse_args()
+
+    with open(args.src_filename, 'rb') as src_file:
+        source = src_file.read()
+    header = {
+        'opt_level': args.opt_level,
+        'tail_calls': args.tail_calls,
+        'backend': args.backend,
+        'jar_compression': args.jar_compression,
+        'instrument': args.instrument,
+        'use_cache': args.use_cache,
+        'tokens': bool(args.tokens_filename),
+    }
+
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.connect(args.socket_path)
+    except socket.error as e:
+        sys.exit("can't connect to compile server at %s (%s), start it with: python listlang.py --serve" %
+                 (args.socket_path, e))
+    try:
+        ll_protocol.send_message(sock, header, source)
+        response, jar_bytes = ll_protocol.receive_message(sock)
+    finally:
+        sock.close()
+
+    if args.tokens_filename and response['tokens'] is not None:
+        with open(args.tokens_filename, 'w') as tokens_file:
+            tokens_file.write(response['tokens'])
+
+    if response['status'] != 'ok':
+        sys.stderr.write('\n'.join(response['errors']))
+        sys.exit(1)
+
+    with open(args.dest_filename, 'wb') as jar_file:
+        jar_file.write(jar_bytes)
+
+
+if __name__ == "__main__":
+    main()
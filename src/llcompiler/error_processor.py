@@ -9,23 +9,25 @@ LEXICAL = 'lexical'
 SYNTAX = 'syntax'
 SEMANTIC = 'semantic'
 
-lexical_errors = []
-syntax_errors = []
-semantic_errors = []
-
-
-def add_error(error_type, line, pos_in_line, message):
-    complete_message = '%i:%i %s error: %s' % (line, pos_in_line, error_type, message)
-    if error_type == LEXICAL:
-        lexical_errors.append(complete_message)
-    elif error_type == SYNTAX:
-        syntax_errors.append(complete_message)
-    elif error_type == SEMANTIC:
-        semantic_errors.append(complete_message)
-
-
-def get_all_errors():
-    return lexical_errors + syntax_errors + semantic_errors
+class Errors:
+    """ Errors found by one compile """
+
+    def __init__(self):
+        self.lexical_errors = []
+        self.syntax_errors = []
+        self.semantic_errors = []
+
+    def add_error(self, error_type, line, pos_in_line, message):
+        complete_message = '%i:%i %s error: %s' % (line, pos_in_line, error_type, message)
+        if error_type == LEXICAL:
+            self.lexical_errors.append(complete_message)
+        elif error_type == SYNTAX:
+            self.syntax_errors.append(complete_message)
+        elif error_type == SEMANTIC:
+            self.semantic_errors.append(complete_message)
+
+    def get_all_errors(self):
+        return self.lexical_errors + self.syntax_errors + self.semantic_errors
 
 
 class SemanticException(Exception):
@@ -5,14 +5,20 @@ LIST = 'List'
 # JTYPES
 VOID_JTYPE = 'V'
 INTEGER_JTYPE = 'I'
+BOOLEAN_JTYPE = 'Z'
+INT_ARRAY_JTYPE = '[I'
 STRING_JTYPE = 'Ljava/lang/String;'
 
 INTEGER_LIST_CLASS = 'listlang/objects/List'
 INTEGER_LIST_JTYPE = 'L%s;' % INTEGER_LIST_CLASS
 
+IO_CLASS = 'listlang/objects/IO'
+COUNTERS_CLASS = 'listlang/objects/Counters'
+
 type_map = {ELEMENT: INTEGER_JTYPE, LIST: INTEGER_LIST_JTYPE}
 
-RESERVED_LOCALS = 10
+# locals before variables, used for temporary values
+RESERVED_LOCALS = 2
 
 TEMPORARY_STORE_VAR_1 = 0
 TEMPORARY_STORE_VAR_2 = 1
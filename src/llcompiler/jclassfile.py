@@ -0,0 +1,399 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+""" Assembler of Jasmin code made by JCodeMaker to JVM class files
+
+Supports the subset of Jasmin used by the compiler: .class, .super, .field and .method directives, .limit,
+labels, comments and instructions of jframe.STACK_EFFECTS with invokes. Class files have version 45.3 as
+made by Jasmin, so the JVM verifies them by type inference and no stack map frames are needed.
+"""
+
+import re
+import struct
+
+from jframe import parse_command, max_stack, max_locals, DESCRIPTOR_PARAM_RE
+
+
+CLASS_FILE_MAGIC = 0xCAFEBABE
+CLASS_FILE_VERSION = (3, 45)    # (minor, major)
+
+ACCESS_FLAGS = {
+    'public': 0x0001, 'private': 0x0002, 'protected': 0x0004, 'static': 0x0008, 'final': 0x0010,
+}
+ACC_SUPER = 0x0020
+
+# constant pool tags
+CONSTANT_UTF8 = 1
+CONSTANT_INTEGER = 3
+CONSTANT_CLASS = 7
+CONSTANT_STRING = 8
+CONSTANT_FIELDREF = 9
+CONSTANT_METHODREF = 10
+CONSTANT_NAME_AND_TYPE = 12
+
+# instructions without operands
+SIMPLE_OPCODES = {
+    'nop': 0x00, 'aconst_null': 0x01,
+    'iconst_m1': 0x02, 'iconst_0': 0x03, 'iconst_1': 0x04, 'iconst_2': 0x05, 'iconst_3': 0x06,
+    'iconst_4': 0x07, 'iconst_5': 0x08,
+    'iload_0': 0x1a, 'iload_1': 0x1b, 'iload_2': 0x1c, 'iload_3': 0x1d,
+    'aload_0': 0x2a, 'aload_1': 0x2b, 'aload_2': 0x2c, 'aload_3': 0x2d,
+    'iaload': 0x2e,
+    'istore_0': 0x3b, 'istore_1': 0x3c, 'istore_2': 0x3d, 'istore_3': 0x3e,
+    'astore_0': 0x4b, 'astore_1': 0x4c, 'astore_2': 0x4d, 'astore_3': 0x4e,
+    'iastore': 0x4f,
+    'pop': 0x57, 'pop2': 0x58, 'dup': 0x59, 'dup_x1': 0x5a, 'dup_x2': 0x5b, 'dup2': 0x5c, 'swap': 0x5f,
+    'iadd': 0x60, 'isub': 0x64, 'imul': 0x68, 'idiv': 0x6c, 'irem': 0x70, 'ineg': 0x74,
+    'ireturn': 0xac, 'areturn': 0xb0, 'return': 0xb1,
+    'arraylength': 0xbe, 'athrow': 0xbf,
+}
+
+LOCAL_VAR_OPCODES = {'iload': 0x15, 'aload': 0x19, 'istore': 0x36, 'astore': 0x3a}
+
+BRANCH_OPCODES = {
+    'ifeq': 0x99, 'ifne': 0x9a, 'iflt': 0x9b, 'ifge': 0x9c, 'ifgt': 0x9d, 'ifle': 0x9e,
+    'if_icmpeq': 0x9f, 'if_icmpne': 0xa0, 'if_icmplt': 0xa1, 'if_icmpge': 0xa2, 'if_icmpgt': 0xa3,
+    'if_icmple': 0xa4, 'if_acmpeq': 0xa5, 'if_acmpne': 0xa6, 'goto': 0xa7, 'ifnull': 0xc6, 'ifnonnull': 0xc7,
+}
+
+# inverted conditions of branches, far conditional branch is made as inverted one over goto_w
+INVERTED_BRANCHES = {
+    'ifeq': 'ifne', 'ifne': 'ifeq', 'iflt': 'ifge', 'ifge': 'iflt', 'ifgt': 'ifle', 'ifle': 'ifgt',
+    'if_icmpeq': 'if_icmpne', 'if_icmpne': 'if_icmpeq', 'if_icmplt': 'if_icmpge', 'if_icmpge': 'if_icmplt',
+    'if_icmpgt': 'if_icmple', 'if_icmple': 'if_icmpgt', 'if_acmpeq': 'if_acmpne', 'if_acmpne': 'if_acmpeq',
+    'ifnull': 'ifnonnull', 'ifnonnull': 'ifnull',
+}
+
+FIELD_OPCODES = {'getstatic': 0xb2, 'putstatic': 0xb3, 'getfield': 0xb4, 'putfield': 0xb5}
+
+INVOKE_OPCODES = {'invokevirtual': 0xb6, 'invokespecial': 0xb7, 'invokestatic': 0xb8}
+
+CLASS_OPCODES = {'new': 0xbb, 'checkcast': 0xc0}
+
+OPCODE_BIPUSH = 0x10
+OPCODE_SIPUSH = 0x11
+OPCODE_LDC = 0x12
+OPCODE_LDC_W = 0x13
+OPCODE_IINC = 0x84
+OPCODE_NEWARRAY = 0xbc
+OPCODE_WIDE = 0xc4
+OPCODE_GOTO_W = 0xc8
+
+MAX_UTF8_LENGTH = 0xffff
+MAX_POOL_ENTRIES = 0xfffe   # pool count is u2 and counts unused entry 0
+MIN_INT = -0x80000000   # range of CONSTANT_Integer
+MAX_INT = 0x7fffffff
+
+NEWARRAY_TYPES = {'boolean': 4, 'char': 5, 'float': 6, 'double': 7, 'byte': 8, 'short': 9, 'int': 10, 'long': 11}
+
+STRING_ESCAPES = {'n': u'\n', 't': u'\t', 'r': u'\r', 'b': u'\b', 'f': u'\f', '"': u'"', "'": u"'", '\\': u'\\'}
+STRING_ESCAPE_RE = re.compile(r'\\(u[0-9a-fA-F]{4}|.)')
+
+
+class AssemblerError(Exception):
+    pass
+
+
+def parse_string_literal(literal):
+    """ Returns unicode value of Jasmin string literal in double quotes """
+    if len(literal) < 2 or literal[0] != '"' or literal[-1] != '"':
+        raise AssemblerError('bad string literal %s' % literal)
+
+    def unescape(match):
+        escape = match.group(1)
+        if escape[0] == 'u' and len(escape) == 5:
+            return unichr(int(escape[1:], 16))
+        return STRING_ESCAPES.get(escape, escape)
+    return STRING_ESCAPE_RE.sub(unescape, literal[1:-1].decode('utf8'))
+
+
+def modified_utf8(text):
+    """ Encodes unicode text to modified UTF-8 of class files: zero as two bytes, supplementary characters
+    as surrogate pairs """
+    result = []
+    for char in text:
+        code = ord(char)
+        if code > 0xffff:
+            code -= 0x10000
+            result.append(modified_utf8(unichr(0xd800 + (code >> 10)) + unichr(0xdc00 + (code & 0x3ff))))
+        elif 0 < code < 0x80:
+            result.append(chr(code))
+        elif code < 0x800:
+            result.append(chr(0xc0 | code >> 6) + chr(0x80 | code & 0x3f))
+        else:
+            result.append(chr(0xe0 | code >> 12) + chr(0x80 | code >> 6 & 0x3f) + chr(0x80 | code & 0x3f))
+    return ''.join(result)
+
+
+def split_member(reference):
+    """ "class/name(params)return" -> (class, name, descriptor), "class/name descriptor" -> same """
+    if '(' in reference:
+        full_name, descriptor = reference[:reference.index('(')], reference[reference.index('('):]
+    else:
+        full_name, descriptor = reference.split()
+    class_name, name = full_name.rsplit('/', 1)
+    return class_name, name, descriptor
+
+
+class ConstantPool:
+
+    def __init__(self):
+        self.entries = []   # packed entries, index of entry is its position + 1
+        self.indexes = {}   # {(tag, value): index}
+
+    def add(self, tag, value, packed):
+        key = tag, value
+        if key not in self.indexes:
+            if len(self.entries) >= MAX_POOL_ENTRIES:
+                raise AssemblerError('constant pool has more than %i entries' % MAX_POOL_ENTRIES)
+            self.entries.append(struct.pack('>B', tag) + packed)
+            self.indexes[key] = len(self.entries)
+        return self.indexes[key]
+
+    def utf8(self, text):
+        if isinstance(text, str):
+            text = text.decode('utf8')
+        encoded = modified_utf8(text)
+        if len(encoded) > MAX_UTF8_LENGTH:
+            raise AssemblerError('string constant "%s..." is %i bytes long, longer than %i bytes' % (
+                text[:20].encode('unicode_escape'), len(encoded), MAX_UTF8_LENGTH
+            ))
+        return self.add(CONSTANT_UTF8, text, struct.pack('>H', len(encoded)) + encoded)
+
+    def integer(self, value):
+        if not MIN_INT <= value <= MAX_INT:
+            raise AssemblerError('integer constant %i is out of int range' % value)
+        return self.add(CONSTANT_INTEGER, value, struct.pack('>i', value))
+
+    def string(self, text):
+        return self.add(CONSTANT_STRING, text, struct.pack('>H', self.utf8(text)))
+
+    def class_ref(self, name):
+        return self.add(CONSTANT_CLASS, name, struct.pack('>H', self.utf8(name)))
+
+    def name_and_type(self, name, descriptor):
+        return self.add(CONSTANT_NAME_AND_TYPE, (name, descriptor),
+                        struct.pack('>HH', self.utf8(name), self.utf8(descriptor)))
+
+    def member_ref(self, tag, reference):
+        class_name, name, descriptor = split_member(reference)
+        return self.add(tag, reference,
+                        struct.pack('>HH', self.class_ref(class_name), self.name_and_type(name, descriptor)))
+
+    def pack(self):
+        return struct.pack('>H', len(self.entries) + 1) + ''.join(self.entries)
+
+
+class MethodAssembler:
+    """ Assembles code of one method to Code attribute
+
+    Branches are assembled with 16 bit offsets, if some of them don't reach their labels, code is assembled again
+    with these branches made far (see add_branch) until all offsets fit.
+    """
+
+    def __init__(self, pool):
+        self.pool = pool
+        self.commands = []      # commands for analysis by jframe
+        self.instructions = []  # (opcode, operand) and ('label', label) to assemble code again
+        self.far_branches = set()   # numbers of branches made with goto_w
+        self.max_stack = None   # computed from code if there is no .limit
+        self.max_locals = None
+        self.reset_code()
+
+    def reset_code(self):
+        self.code = []          # packed instructions
+        self.code_length = 0
+        self.labels = {}        # {label: offset}
+        self.fixups = []        # (instruction offset, branch offset position in code, label, branch number)
+        self.branches_number = 0
+
+    def emit(self, packed):
+        self.code.append(packed)
+        self.code_length += len(packed)
+
+    def add_label(self, label):
+        self.commands.append('%s:' % label)
+        self.instructions.append(('label', label))
+        self.labels[label] = self.code_length
+
+    def add_instruction(self, opcode, operand):
+        self.commands.append('%s %s' % (opcode, operand) if operand else opcode)
+        self.instructions.append((opcode, operand))
+        self.emit_instruction(opcode, operand)
+
+    def emit_instruction(self, opcode, operand):
+        if opcode in SIMPLE_OPCODES:
+            self.emit(struct.pack('>B', SIMPLE_OPCODES[opcode]))
+        elif opcode in LOCAL_VAR_OPCODES:
+            self.add_local_var_instruction(opcode, int(operand))
+        elif opcode in BRANCH_OPCODES:
+            self.add_branch(opcode, operand)
+        elif opcode in INVOKE_OPCODES:
+            self.emit(struct.pack('>BH', INVOKE_OPCODES[opcode], self.pool.member_ref(CONSTANT_METHODREF, operand)))
+        elif opcode in FIELD_OPCODES:
+            self.emit(struct.pack('>BH', FIELD_OPCODES[opcode], self.pool.member_ref(CONSTANT_FIELDREF, operand)))
+        elif opcode in CLASS_OPCODES:
+            self.emit(struct.pack('>BH', CLASS_OPCODES[opcode], self.pool.class_ref(operand)))
+        elif opcode in ('ldc', 'ldc_w'):
+            self.add_ldc(operand)
+        elif opcode == 'bipush':
+            self.emit(struct.pack('>Bb', OPCODE_BIPUSH, int(operand)))
+        elif opcode == 'sipush':
+            self.emit(struct.pack('>Bh', OPCODE_SIPUSH, int(operand)))
+        elif opcode == 'iinc':
+            var_number, value = [int(part) for part in operand.split()]
+            if var_number <= 0xff and -128 <= value <= 127:
+                self.emit(struct.pack('>BBb', OPCODE_IINC, var_number, value))
+            else:
+                self.emit(struct.pack('>BBHh', OPCODE_WIDE, OPCODE_IINC, var_number, value))
+        elif opcode == 'newarray':
+            self.emit(struct.pack('>BB', OPCODE_NEWARRAY, NEWARRAY_TYPES[operand]))
+        else:
+            raise AssemblerError('unsupported instruction %s' % opcode)
+
+    def add_branch(self, opcode, label):
+        """ Far goto is goto_w, far conditional branch jumps over goto_w to label by inverted condition """
+        branch = self.branches_number
+        self.branches_number += 1
+        if branch not in self.far_branches:
+            self.fixups.append((self.code_length, self.code_length + 1, label, branch))
+            self.emit(struct.pack('>Bh', BRANCH_OPCODES[opcode], 0))
+            return
+        if opcode != 'goto':
+            # 3 bytes of this branch and 5 bytes of goto_w
+            self.emit(struct.pack('>Bh', BRANCH_OPCODES[INVERTED_BRANCHES[opcode]], 8))
+        self.fixups.append((self.code_length, self.code_length + 1, label, branch))
+        self.emit(struct.pack('>Bi', OPCODE_GOTO_W, 0))
+
+    def assemble_again(self):
+        self.reset_code()
+        for opcode, operand in self.instructions:
+            if opcode == 'label':
+                self.labels[operand] = self.code_length
+            else:
+                self.emit_instruction(opcode, operand)
+
+    def link_code(self):
+        """ Returns code with branch offsets or None if some of branches are too far and code is assembled again """
+        code = bytearray(''.join(self.code))
+        too_far = set()
+        for instruction_offset, position, label, branch in self.fixups:
+            if label not in self.labels:
+                raise AssemblerError('undefined label %s' % label)
+            offset = self.labels[label] - instruction_offset
+            if branch in self.far_branches:
+                code[position:position + 4] = struct.pack('>i', offset)
+            elif -0x8000 <= offset <= 0x7fff:
+                code[position:position + 2] = struct.pack('>h', offset)
+            else:
+                too_far.add(branch)
+        if too_far:
+            self.far_branches.update(too_far)
+            self.assemble_again()
+            return None
+        return code
+
+    def add_local_var_instruction(self, opcode, var_number):
+        if var_number <= 3:
+            self.emit(struct.pack('>B', SIMPLE_OPCODES['%s_%i' % (opcode, var_number)]))
+        elif var_number <= 0xff:
+            self.emit(struct.pack('>BB', LOCAL_VAR_OPCODES[opcode], var_number))
+        else:
+            self.emit(struct.pack('>BBH', OPCODE_WIDE, LOCAL_VAR_OPCODES[opcode], var_number))
+
+    def add_ldc(self, operand):
+        if operand.startswith('"'):
+            index = self.pool.string(parse_string_literal(operand))
+        else:
+            index = self.pool.integer(int(operand))
+        if index <= 0xff:
+            self.emit(struct.pack('>BB', OPCODE_LDC, index))
+        else:
+            self.emit(struct.pack('>BH', OPCODE_LDC_W, index))
+
+    def pack_code_attribute(self, params_number):
+        """ params_number - number of local variables taken by params (with this for instance methods) """
+        if self.max_stack is None:
+            self.max_stack = max_stack(self.commands)
+        if self.max_locals is None:
+            self.max_locals = max_locals(self.commands, params_number)
+
+        code = self.link_code()
+        while code is None:
+            code = self.link_code()
+        if len(code) > 0xffff:
+            raise AssemblerError('method code is too large')
+
+        body = (struct.pack('>HHI', self.max_stack, self.max_locals, len(code)) + str(code) +
+                struct.pack('>HH', 0, 0))   # no exception table and attributes
+        return struct.pack('>HI', self.pool.utf8('Code'), len(body)) + body
+
+
+def parse_access_flags(words):
+    flags = 0
+    for word in words:
+        flags |= ACCESS_FLAGS.get(word, 0)
+    return flags
+
+
+def assemble(jasmin_code):
+    """ Returns (class_name, class_file_bytes) for Jasmin code of one class """
+    pool = ConstantPool()
+    class_name = super_name = None
+    class_flags = 0
+    fields = []
+    methods = []
+    method = None
+
+    for line_number, line in enumerate(jasmin_code.splitlines(), 1):
+        words = line.split()
+        try:
+            if not words or words[0].startswith(';'):
+                continue
+            directive = words[0]
+            if directive == '.class':
+                class_flags = parse_access_flags(words[1:-1]) | ACC_SUPER
+                class_name = words[-1]
+            elif directive == '.super':
+                super_name = words[1]
+            elif directive == '.field':
+                name, descriptor = words[-2:]
+                fields.append(struct.pack('>HHHH', parse_access_flags(words[1:-2]),
+                                          pool.utf8(name), pool.utf8(descriptor), 0))
+            elif directive == '.method':
+                signature = words[-1]
+                method = MethodAssembler(pool)
+                method_flags = parse_access_flags(words[1:-1])
+                method_name = signature[:signature.index('(')]
+                method_descriptor = signature[signature.index('('):]
+            elif directive == '.limit':
+                if words[1] == 'stack':
+                    method.max_stack = int(words[2])
+                else:
+                    method.max_locals = int(words[2])
+            elif directive == '.end':
+                params_number = len(DESCRIPTOR_PARAM_RE.findall(method_descriptor.split(')')[0]))
+                if not method_flags & ACCESS_FLAGS['static']:
+                    params_number += 1  # this
+                methods.append(struct.pack('>HHHH', method_flags, pool.utf8(method_name),
+                                           pool.utf8(method_descriptor), 1) +
+                               method.pack_code_attribute(params_number))
+                method = None
+            else:
+                opcode, operand = parse_command(line)
+                if opcode == 'label':
+                    method.add_label(operand)
+                else:
+                    method.add_instruction(opcode, operand)
+        except AssemblerError as e:
+            raise AssemblerError('line %i: %s' % (line_number, e))
+
+    if class_name is None or super_name is None:
+        raise AssemblerError('class or super class is not defined')
+
+    header = struct.pack('>IHH', CLASS_FILE_MAGIC, *CLASS_FILE_VERSION)
+    class_info = struct.pack('>HHHH', class_flags, pool.class_ref(class_name), pool.class_ref(super_name), 0)
+    fields_info = struct.pack('>H', len(fields)) + ''.join(fields)
+    methods_info = struct.pack('>H', len(methods)) + ''.join(methods)
+    attributes_info = struct.pack('>H', 0)
+    # constant pool is complete only after all members are packed
+    return class_name, header + pool.pack() + class_info + fields_info + methods_info + attributes_info
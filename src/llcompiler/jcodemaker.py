@@ -4,6 +4,9 @@
 __author__ = 'Oleg Beloglazov'
 
 from globals import *
+import jframe
+import jescape
+import peephole
 
 
 class JCodeMaker:
@@ -19,43 +22,7 @@ class JCodeMaker:
 .end method
 '''
 
-    BUILTIN_METHODS = '''; void print(int)
-.method public static print(I)V
-    .limit locals 5
-    .limit stack 5
-    iload 0
-    getstatic java/lang/System/out Ljava/io/PrintStream;
-    swap
-    invokevirtual java/io/PrintStream/print(I)V
-    return
-.end method
-
-; void print(string)
-.method public static print(Ljava/lang/String;)V
-    .limit locals 5
-    .limit stack 5
-    aload 0
-    getstatic java/lang/System/out Ljava/io/PrintStream;
-    swap
-    invokevirtual java/io/PrintStream/print(Ljava/lang/String;)V
-    return
-.end method
-
-
-
-; int neg(int)
-.method public static neg(I)I
-    .limit locals 5
-    .limit stack 5
-    iload 0
-    ifeq RET_1
-    ldc 0
-    ireturn
-    RET_1:
-    ldc 1
-    ireturn
-.end method
-'''
+    CONSTANT_ARRAY_CHUNK_SIZE = 4096
 
     JMETHOD_TEMPLATE = '''.method public static %s(%s)%s
 \t.limit stack %i
@@ -69,29 +36,69 @@ class JCodeMaker:
         self.list = ListJavaMediator(self)
 
         self.commands = []
+        self.first_commands = []    # commands added first in reverse order, see insert_first_commands
         self.return_jtype = VOID_JTYPE
         self.return_label = 'RETURN_LABEL'
+        self.start_label = 'START_LABEL'
+        self.start_label_used = False     # method has self tail calls jumping to its prologue
         self.label_counter = 0
         self.fields = []
         self.stack_size = 0
 
-    def make_class(self, stack_size, locals_number, methods_code):
-        """ Make Jasmin class with using commands of this maker for main method """
+    def make_class(self, methods_code, constant_arrays=(), opt_level=0, counter_names=None):
+        """ Make Jasmin class with using commands of this maker for main method,
+        constant_arrays - [(field_name, values)] of int arrays initialized on class loading,
+        counter_names - names of runtime counters for instrumented program or None """
+        for field_name, values in constant_arrays:
+            self.add_static_field(field_name, INT_ARRAY_JTYPE)
         fields = '\n'.join(self.fields) + '\n'
         bultin_functions_jcode = '\n'.join([func_jcode[2] for func_jcode in BUILTIN_FUNCTIONS.values()])
         return (self.CLASS_HEADER +
                 fields +
                 self.CLASS_INIT +
-                self.make_method('main', ['[Ljava/lang/String;'], stack_size, locals_number) +
+                self.make_class_static_init(constant_arrays, counter_names) +
+                self.make_method('main', ['[Ljava/lang/String;'], flush_output=True, opt_level=opt_level) +
                 methods_code +
-                self.BUILTIN_METHODS +
                 bultin_functions_jcode
         )
 
-    def make_method(self, name, params_jtypes, stack_size, locals_number):
-        """ Returns code of method with code maked by this maker """
+    def make_class_static_init(self, constant_arrays, counter_names=None):
+        """ Returns <clinit> method which fills constant arrays from their string representation
+        and starts runtime counters """
+        if not constant_arrays and counter_names is None:
+            return ''
+
+        code = []
+        if counter_names is not None:
+            code.append('ldc "%s"' % ','.join(counter_names))
+            code.append('invokestatic %s/start(%s)%s' % (COUNTERS_CLASS, STRING_JTYPE, VOID_JTYPE))
+        for field_name, values in constant_arrays:
+            code.append('ldc %i' % len(values))
+            code.append('newarray int')
+            # string constants are limited in size, so fill array by chunks
+            for offset in xrange(0, len(values), self.CONSTANT_ARRAY_CHUNK_SIZE):
+                chunk = values[offset:offset + self.CONSTANT_ARRAY_CHUNK_SIZE]
+                code.append('ldc "%s"' % ','.join(str(value) for value in chunk))
+                code.append('ldc %i' % offset)
+                code.append('invokestatic %s/fillConstant(%s%sI)%s' % (
+                    INTEGER_LIST_CLASS, INT_ARRAY_JTYPE, STRING_JTYPE, INT_ARRAY_JTYPE
+                ))
+            code.append('putstatic %s/%s %s' % (TARGET_CLASS_NAME, field_name, INT_ARRAY_JTYPE))
+        code.append('return')
+
+        return self.JMETHOD_TEMPLATE % ('<clinit>', '', VOID_JTYPE, jframe.max_stack(code), 0, '\n\t'.join(code))
+
+    def make_method(self, name, params_jtypes, flush_output=False, opt_level=0, counter=None,
+                    global_free_methods=frozenset()):
+        """ Returns code of method with code maked by this maker,
+        flush_output - flush buffered program output before return (for main method),
+        opt_level - 0 to keep commands as is, 1 to run peephole optimizer and skip clones of read-only params,
+        counter - runtime counter of calls of instrumented program or None,
+        global_free_methods - names of already made methods which don't touch global lists (see jescape) """
         # add return
         self.command_label(self.return_label)
+        if flush_output:
+            self.command_invokestatic(IO_CLASS, 'flush', [], VOID_JTYPE)
         if self.stack_size == 0 and self.return_jtype != VOID_JTYPE:
             if self.return_jtype == INTEGER_JTYPE:
                 self.command_ldc(0)
@@ -102,18 +109,47 @@ class JCodeMaker:
 
         self.command_return()
 
+        # self tail calls jump to method start, so analysis sees this label before code
+        label_command = '\n%s:' % self.start_label
+        if self.start_label_used:
+            self.add_command(label_command, add_first=True)
+            self.insert_first_commands()
+
+        list_params_vars = dict(
+            (i, RESERVED_LOCALS + i) for i, param_jtype in enumerate(params_jtypes) if param_jtype == INTEGER_LIST_JTYPE
+        )
+        if opt_level >= 1 and list_params_vars:
+            cloned_params = jescape.unsafe_params(self.commands, list_params_vars, name, global_free_methods)
+        else:
+            cloned_params = list_params_vars
+
+        if self.start_label_used:
+            # but in target code it is placed before prologue, which moves new args to variables
+            self.commands.remove(label_command)
+        if counter is not None:
+            # after prologue, so self tail calls are counted too
+            self.add_command(self.counter_hit_command(), add_first=True)
+            self.add_command('ldc %i' % counter, add_first=True)
         # move locals of method args
         self.add_command('', add_first=True)
         for i, param_jtype in enumerate(params_jtypes):
             # reverse order of calls since adding first
             self.command_store(param_jtype, RESERVED_LOCALS + i, add_first=True)
-            if param_jtype == INTEGER_LIST_JTYPE:
+            if i in cloned_params:
                 self.command_invokevirtual(INTEGER_LIST_CLASS, 'clone', [], INTEGER_LIST_JTYPE, add_first=True)
             self.command_load(param_jtype, i, add_first=True)
+        if self.start_label_used:
+            self.add_command(label_command, add_first=True)
+        self.insert_first_commands()
+
+        if opt_level >= 1:
+            self.commands = peephole.optimize(self.commands)
 
+        stack_size = jframe.max_stack(self.commands)
+        locals_number = jframe.max_locals(self.commands, len(params_jtypes))
 
         code = '\n\t'.join(self.commands)
-        return self.JMETHOD_TEMPLATE % (name, ''.join(params_jtypes), self.return_jtype, stack_size, locals_number+1, code)
+        return self.JMETHOD_TEMPLATE % (name, ''.join(params_jtypes), self.return_jtype, stack_size, locals_number, code)
 
     def make_label(self, scope_number, name):
         self.label_counter += 1
@@ -128,10 +164,16 @@ class JCodeMaker:
 
     def add_command(self, command, add_first=False):
         if add_first:
-            self.commands.insert(0, command)
+            # inserting every command at the start would copy all commands
+            self.first_commands.append(command)
         else:
             self.commands.append(command)
 
+    def insert_first_commands(self):
+        """ Moves commands added first to the start of commands """
+        self.commands[0:0] = reversed(self.first_commands)
+        self.first_commands = []
+
     # COMMANDS
 
     def command_ldc(self, value):
@@ -178,6 +220,24 @@ class JCodeMaker:
         self.add_command('dup')
         self.stack_size += 1
 
+    def command_dup_x1(self):
+        """ Jasmin command to duplicate top value on stack and insert it under second value """
+        self.add_command('dup_x1')
+        self.stack_size += 1
+
+    def command_newarray_int(self):
+        """ Jasmin command to pop size and push new int array """
+        self.add_command('newarray int')
+
+    def command_iinc(self, var_number, value):
+        """ Jasmin command to add constant to int variable """
+        self.add_command('iinc %s %i' % (var_number, value))
+
+    def command_iastore(self):
+        """ Jasmin command to pop array, index, value and store value to array """
+        self.add_command('iastore')
+        self.stack_size -= 3
+
     def command_pop(self):
         """ Jasmin command to pop top value from stack """
         self.add_command('pop')
@@ -216,6 +276,10 @@ class JCodeMaker:
         self.add_command('ifne ' + label)
         self.stack_size -= 1
 
+    def command_ifle(self, label):
+        self.add_command('ifle ' + label)
+        self.stack_size -= 1
+
     def command_ifeq(self, label):
         self.add_command('ifeq ' + label)
         self.stack_size -= 1
@@ -227,6 +291,10 @@ class JCodeMaker:
         self.add_command('if_icmpeq ' + label)
         self.stack_size -= 2
 
+    def command_if_icmpne(self, label):
+        self.add_command('if_icmpne ' + label)
+        self.stack_size -= 2
+
     def command_if_icmplt(self, label):
         self.add_command('if_icmplt ' + label)
         self.stack_size -= 2
@@ -272,6 +340,15 @@ class JCodeMaker:
     def command_comment(self, comment):
         self.add_command('\n\t; %s; stack=%i' % (comment, self.stack_size))
 
+    def counter_hit_command(self):
+        return 'invokestatic %s/hit(%s)%s' % (COUNTERS_CLASS, INTEGER_JTYPE, VOID_JTYPE)
+
+    def command_counter_hit(self, counter):
+        """ Jasmin commands to count hit of runtime counter of instrumented program """
+        self.command_ldc(counter)
+        self.add_command(self.counter_hit_command())
+        self.stack_size -= 1
+
     def command_putstatic(self, jclass, field, jtype):
         self.add_command('putstatic %s/%s %s' % (jclass, field, jtype))
         self.stack_size -= 1
@@ -306,11 +383,7 @@ BUILTIN_FUNCTIONS = {
     .limit locals 10
     .limit stack 10
 
-    new java/util/Scanner
-	dup
-	getstatic java/lang/System/in Ljava/io/InputStream;
-	invokespecial java/util/Scanner/<init>(Ljava/io/InputStream;)V
-	invokevirtual java/util/Scanner/nextInt()I
+    invokestatic listlang/objects/IO/readInt()I
 
     ireturn
 .end method'''),
@@ -338,6 +411,15 @@ class ListJavaMediator:
     def get(self):
         self.code_maker.command_invokevirtual(INTEGER_LIST_CLASS, 'get', [INTEGER_JTYPE], INTEGER_JTYPE)
 
+    def boolean_value(self):
+        self.code_maker.command_invokevirtual(INTEGER_LIST_CLASS, 'boolean_value', [], BOOLEAN_JTYPE)
+
+    def cursor(self):
+        self.code_maker.command_invokevirtual(INTEGER_LIST_CLASS, 'cursor', [], INTEGER_LIST_JTYPE)
+
+    def next(self):
+        self.code_maker.command_invokevirtual(INTEGER_LIST_CLASS, 'next', [], INTEGER_JTYPE)
+
     def to_int(self):
         self.code_maker.command_invokevirtual(INTEGER_LIST_CLASS, 'to_int', [], INTEGER_JTYPE)
 
@@ -350,6 +432,12 @@ class ListJavaMediator:
     def concat(self):
         self.code_maker.command_invokevirtual(INTEGER_LIST_CLASS, 'concat', [INTEGER_LIST_JTYPE], INTEGER_LIST_JTYPE)
 
+    def with_capacity(self):
+        self.code_maker.command_invokestatic(INTEGER_LIST_CLASS, 'withCapacity', [INTEGER_JTYPE], INTEGER_LIST_JTYPE)
+
+    def append_all(self):
+        self.code_maker.command_invokevirtual(INTEGER_LIST_CLASS, 'appendAll', [INTEGER_LIST_JTYPE], VOID_JTYPE)
+
     def addFirst(self):
         self.code_maker.command_invokevirtual(INTEGER_LIST_CLASS, 'addFirst', [INTEGER_JTYPE], VOID_JTYPE)
 
@@ -379,6 +467,33 @@ class ListJavaMediator:
         self.code_maker.command_dup()
         self.code_maker.command_invokespecial(INTEGER_LIST_CLASS, '<init>', [], VOID_JTYPE)
 
+    def new_from_array(self):
+        """ Replaces int array on top of stack with new list of its values """
+        self.code_maker.command_new(INTEGER_LIST_CLASS)
+        self.code_maker.command_dup_x1()
+        self.code_maker.command_swap()
+        self.code_maker.command_invokespecial(INTEGER_LIST_CLASS, '<init>', [INT_ARRAY_JTYPE], VOID_JTYPE)
+
+    def new_from_static_array(self, jclass, field):
+        self.code_maker.command_new(INTEGER_LIST_CLASS)
+        self.code_maker.command_dup()
+        self.code_maker.command_getstatic(jclass, field, INT_ARRAY_JTYPE)
+        self.code_maker.command_invokespecial(INTEGER_LIST_CLASS, '<init>', [INT_ARRAY_JTYPE], VOID_JTYPE)
+
+    def range_length(self):
+        self.code_maker.command_invokevirtual(
+            INTEGER_LIST_CLASS, 'rangeLength', [INTEGER_JTYPE, INTEGER_JTYPE], INTEGER_JTYPE
+        )
+
+    def position(self):
+        self.code_maker.command_invokevirtual(INTEGER_LIST_CLASS, 'position', [INTEGER_JTYPE], INTEGER_JTYPE)
+
+    def pin(self):
+        self.code_maker.command_invokevirtual(INTEGER_LIST_CLASS, 'pin', [], INT_ARRAY_JTYPE)
+
+    def at(self):
+        self.code_maker.command_invokestatic(INTEGER_LIST_CLASS, 'at', [INT_ARRAY_JTYPE, INTEGER_JTYPE], INTEGER_JTYPE)
+
     def slice(self):
         self.code_maker.command_invokevirtual(
             INTEGER_LIST_CLASS, 'slice', [INTEGER_JTYPE, INTEGER_JTYPE], INTEGER_LIST_JTYPE
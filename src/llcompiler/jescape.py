@@ -0,0 +1,183 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+""" Mutation and escape analysis of List parameters over Jasmin command streams made by JCodeMaker
+
+Parameters are passed by value, so method prologue clones every List parameter. Clone isn't needed if the
+parameter object is never mutated and never escapes the method (returned or stored to static field), it's
+found by abstract interpretation: every stack and local value holds set of parameters it may refer to.
+
+Caller may pass global list as argument, so parameter is unsafe also if any global list may be mutated during the
+call: values of global lists and results of user functions are marked as GLOBAL, mutation of such value or call of
+function which isn't global free (see is_global_free) makes all parameters unsafe.
+"""
+
+from jframe import parse_commands, BRANCH_OPCODES, TERMINAL_OPCODES, INVOKE_OPCODES, STACK_EFFECTS, \
+    DESCRIPTOR_PARAM_RE
+from globals import INTEGER_LIST_CLASS, INTEGER_LIST_JTYPE, TARGET_CLASS_NAME
+
+
+# List methods which change list object they are called for
+MUTATING_METHODS = frozenset(['addFirst', 'addLast', 'appendAll', 'delete', 'removeFirst', 'removeLast', 'next',
+                              'pre_incr', 'pre_decr', 'post_incr', 'post_decr'])
+
+# List methods which may return list object they are called for
+RECEIVER_RESULT_METHODS = frozenset(['multiply', 'pre_incr', 'pre_decr', 'post_incr', 'post_decr'])
+
+# number of values popped from stack by instructions without special handling
+POPS = {
+    'iadd': 2, 'isub': 2, 'imul': 2, 'idiv': 2, 'irem': 2, 'ineg': 1,
+    'ifeq': 1, 'ifne': 1, 'iflt': 1, 'ifge': 1, 'ifgt': 1, 'ifle': 1, 'ifnull': 1, 'ifnonnull': 1,
+    'if_icmpeq': 2, 'if_icmpne': 2, 'if_icmplt': 2, 'if_icmpge': 2, 'if_icmpgt': 2, 'if_icmple': 2,
+    'if_acmpeq': 2, 'if_acmpne': 2,
+    'iaload': 2, 'iastore': 3, 'arraylength': 1, 'newarray': 1, 'checkcast': 1,
+    'ireturn': 1, 'athrow': 1, 'pop': 1, 'pop2': 2,
+}
+
+NOTHING = frozenset()
+
+# marker of values which may refer to global list
+GLOBAL = 'global'
+
+
+def parse_invoke(method):
+    """ Returns (class_name, method_name, params_number, returns_value) for "class/name(params)return" """
+    full_name, descriptor = method.split('(')
+    class_name, method_name = full_name.rsplit('/', 1)
+    params, return_jtype = descriptor.split(')')
+    return class_name, method_name, len(DESCRIPTOR_PARAM_RE.findall(params)), return_jtype != 'V'
+
+
+def is_global_free(commands, method_name, global_free_methods):
+    """ Returns True if method neither reads nor writes global lists and calls only global free methods,
+    such method can't mutate global list and can't return it, self calls are allowed """
+    instructions = parse_commands(commands)[0]
+    for opcode, operand in instructions:
+        if opcode in ('getstatic', 'putstatic') and operand.split()[-1] == INTEGER_LIST_JTYPE:
+            return False
+        if opcode == 'invokestatic':
+            class_name, called_name = parse_invoke(operand)[0:2]
+            if class_name == TARGET_CLASS_NAME and called_name != method_name \
+                    and called_name not in global_free_methods:
+                return False
+    return True
+
+
+def mutates_lists(commands, global_free_methods):
+    """ Returns True if code may change list objects made before it: it calls mutating List method
+    or function of program class which isn't global free """
+    instructions = parse_commands(commands)[0]
+    for opcode, operand in instructions:
+        if opcode in INVOKE_OPCODES:
+            class_name, called_name = parse_invoke(operand)[0:2]
+            if class_name == INTEGER_LIST_CLASS and called_name in MUTATING_METHODS:
+                return True
+            if class_name == TARGET_CLASS_NAME and called_name not in global_free_methods:
+                return True
+    return False
+
+
+def unsafe_params(commands, params_vars, method_name=None, global_free_methods=frozenset()):
+    """ Returns set of parameters which may be mutated or escape,
+    params_vars - {param_index: local variable number holding it} for List parameters,
+    method_name - name of analyzed method, its self calls don't make parameters unsafe,
+    global_free_methods - names of methods of program class known to be global free """
+    instructions, labels = parse_commands(commands)
+    unsafe = set()
+    if is_global_free(commands, method_name, global_free_methods):
+        global_free_methods = set(global_free_methods) | set([method_name])
+
+    def make_unsafe(refs):
+        if GLOBAL in refs:
+            unsafe.update(params_vars)
+        else:
+            unsafe.update(refs)
+
+    # state before instruction: (stack, locals), stack - tuple of sets, locals - {var_number: set} of variables
+    # which may refer to parameters, other variables aren't kept, so copies of locals stay small
+    initial_locals = dict((var, frozenset([param])) for param, var in params_vars.items())
+    states = {0: ((), initial_locals)}
+    pending = [0]
+
+    def merge(index, state):
+        if index >= len(instructions):
+            return
+        if index not in states:
+            states[index] = state
+            pending.append(index)
+            return
+        old_stack, old_locals = states[index]
+        stack, local_vars = state
+        if len(old_stack) != len(stack):
+            # inconsistent stack depth, don't trust anything
+            unsafe.update(params_vars)
+            return
+        new_stack = tuple(old | new for old, new in zip(old_stack, stack))
+        new_locals = dict(old_locals)
+        for var, refs in local_vars.items():
+            new_locals[var] = new_locals.get(var, NOTHING) | refs
+        if new_stack != old_stack or new_locals != old_locals:
+            states[index] = (new_stack, new_locals)
+            pending.append(index)
+
+    while pending:
+        index = pending.pop()
+        stack, local_vars = states[index]
+        stack = list(stack)
+        local_vars = dict(local_vars)
+        opcode, operand = instructions[index]
+
+        if opcode == 'aload':
+            stack.append(local_vars.get(int(operand), NOTHING))
+        elif opcode == 'astore':
+            refs = stack.pop()
+            if refs:
+                local_vars[int(operand)] = refs
+            else:
+                local_vars.pop(int(operand), None)
+        elif opcode == 'istore':
+            stack.pop()
+            local_vars.pop(int(operand), None)
+        elif opcode in ('areturn', 'putstatic'):
+            make_unsafe(stack.pop())
+        elif opcode == 'getstatic':
+            stack.append(frozenset([GLOBAL]) if operand.split()[-1] == INTEGER_LIST_JTYPE else NOTHING)
+        elif opcode == 'dup':
+            stack.append(stack[-1])
+        elif opcode == 'dup_x1':
+            stack.insert(-2, stack[-1])
+        elif opcode == 'swap':
+            stack[-1], stack[-2] = stack[-2], stack[-1]
+        elif opcode in INVOKE_OPCODES:
+            class_name, called_name, params_number, returns_value = parse_invoke(operand)
+            pops = params_number + (opcode != 'invokestatic')
+            user_call = opcode == 'invokestatic' and class_name == TARGET_CLASS_NAME
+            list_call = opcode == 'invokevirtual' and class_name == INTEGER_LIST_CLASS
+            receiver = stack[-pops] if list_call else NOTHING
+            if list_call and called_name in MUTATING_METHODS:
+                make_unsafe(receiver)
+            elif user_call and called_name != method_name and called_name not in global_free_methods:
+                # called function may mutate global list passed as parameter
+                unsafe.update(params_vars)
+            del stack[len(stack) - pops:]
+            if returns_value:
+                # called methods never return objects of their arguments: List methods make new lists (or return
+                # the list they are called for) and user functions clone escaping parameters, but user functions
+                # may return global lists
+                if list_call and called_name in RECEIVER_RESULT_METHODS:
+                    stack.append(receiver)
+                elif user_call and called_name not in global_free_methods:
+                    stack.append(frozenset([GLOBAL]))
+                else:
+                    stack.append(NOTHING)
+        else:
+            pops = POPS.get(opcode, 0)
+            del stack[len(stack) - pops:]
+            stack.extend([NOTHING] * (pops + STACK_EFFECTS[opcode]))
+
+        state = (tuple(stack), local_vars)
+        if opcode in BRANCH_OPCODES:
+            merge(labels[operand], state)
+        if opcode not in TERMINAL_OPCODES:
+            merge(index + 1, state)
+
+    return unsafe
@@ -0,0 +1,125 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+""" Analysis of Jasmin command streams made by JCodeMaker: max stack depth and number of locals """
+
+import re
+
+
+# stack effect of instructions with fixed effect
+STACK_EFFECTS = {
+    'nop': 0,
+    'aconst_null': 1,
+    'iconst_m1': 1, 'iconst_0': 1, 'iconst_1': 1, 'iconst_2': 1, 'iconst_3': 1, 'iconst_4': 1, 'iconst_5': 1,
+    'bipush': 1, 'sipush': 1, 'ldc': 1, 'ldc_w': 1,
+    'iload': 1, 'aload': 1,
+    'iload_0': 1, 'iload_1': 1, 'iload_2': 1, 'iload_3': 1,
+    'aload_0': 1, 'aload_1': 1, 'aload_2': 1, 'aload_3': 1,
+    'istore': -1, 'astore': -1,
+    'istore_0': -1, 'istore_1': -1, 'istore_2': -1, 'istore_3': -1,
+    'astore_0': -1, 'astore_1': -1, 'astore_2': -1, 'astore_3': -1,
+    'iinc': 0,
+    'iaload': -1, 'iastore': -3, 'arraylength': 0, 'newarray': 0,
+    'pop': -1, 'pop2': -2, 'dup': 1, 'dup_x1': 1, 'dup_x2': 1, 'dup2': 2, 'swap': 0,
+    'iadd': -1, 'isub': -1, 'imul': -1, 'idiv': -1, 'irem': -1, 'ineg': 0,
+    'ifeq': -1, 'ifne': -1, 'iflt': -1, 'ifge': -1, 'ifgt': -1, 'ifle': -1,
+    'if_icmpeq': -2, 'if_icmpne': -2, 'if_icmplt': -2, 'if_icmpge': -2, 'if_icmpgt': -2, 'if_icmple': -2,
+    'if_acmpeq': -2, 'if_acmpne': -2, 'ifnull': -1, 'ifnonnull': -1,
+    'goto': 0,
+    'ireturn': -1, 'areturn': -1, 'return': 0, 'athrow': -1,
+    'new': 1, 'checkcast': 0,
+    'getstatic': 1, 'putstatic': -1,
+}
+
+BRANCH_OPCODES = frozenset([
+    'ifeq', 'ifne', 'iflt', 'ifge', 'ifgt', 'ifle',
+    'if_icmpeq', 'if_icmpne', 'if_icmplt', 'if_icmpge', 'if_icmpgt', 'if_icmple',
+    'if_acmpeq', 'if_acmpne', 'ifnull', 'ifnonnull', 'goto',
+])
+
+# instructions after which execution does not continue to the next one
+TERMINAL_OPCODES = frozenset(['goto', 'ireturn', 'areturn', 'return', 'athrow'])
+
+INVOKE_OPCODES = frozenset(['invokevirtual', 'invokespecial', 'invokestatic'])
+
+LOCAL_VAR_OPCODES = frozenset(['iload', 'aload', 'istore', 'astore', 'iinc'])
+
+DESCRIPTOR_PARAM_RE = re.compile(r'\[*(?:L[^;]+;|[BCDFIJSZ])')
+
+
+def parse_command(command):
+    """ Returns (opcode, operand) of instruction, ('label', name) of label or None for comments and blank lines """
+    command = command.strip()
+    if not command or command.startswith(';'):
+        return None
+    if command.endswith(':'):
+        return 'label', command[:-1]
+    parts = command.split(None, 1)
+    return parts[0], parts[1] if len(parts) > 1 else None
+
+
+def parse_commands(commands):
+    """ Returns list of (opcode, operand) without labels and comments and dict {label: instruction_index} """
+    instructions = []
+    labels = {}
+    for command in commands:
+        parsed = parse_command(command)
+        if parsed is None:
+            continue
+        if parsed[0] == 'label':
+            labels[parsed[1]] = len(instructions)
+        else:
+            instructions.append(parsed)
+    return instructions, labels
+
+
+def invoke_stack_effect(opcode, method):
+    """ Stack effect of invoke instruction with method as "class/name(params)return" """
+    params, return_jtype = method[method.index('(') + 1:].split(')')
+    effect = -len(DESCRIPTOR_PARAM_RE.findall(params))
+    if opcode != 'invokestatic':
+        effect -= 1     # object reference
+    if return_jtype != 'V':
+        effect += 1
+    return effect
+
+
+def stack_effect(opcode, operand):
+    if opcode in INVOKE_OPCODES:
+        return invoke_stack_effect(opcode, operand)
+    return STACK_EFFECTS[opcode]
+
+
+def max_stack(commands):
+    """ Returns max operand stack depth of method code, following branches from method start """
+    instructions, labels = parse_commands(commands)
+
+    result = 0
+    entry_depths = {}   # {instruction_index: max stack depth before it}
+    pending = [(0, 0)]  # (instruction_index, stack_depth)
+    while pending:
+        index, depth = pending.pop()
+        # code is walked again only if reached with deeper stack (e.g. at RETURN_LABEL)
+        while index < len(instructions) and entry_depths.get(index, -1) < depth:
+            entry_depths[index] = depth
+            opcode, operand = instructions[index]
+            depth += stack_effect(opcode, operand)
+            result = max(result, depth)
+            if opcode in BRANCH_OPCODES:
+                pending.append((labels[operand], depth))
+            if opcode in TERMINAL_OPCODES:
+                break
+            index += 1
+    return result
+
+
+def max_locals(commands, params_number):
+    """ Returns number of local variable slots used by method code """
+    result = params_number
+    for command in commands:
+        parsed = parse_command(command)
+        if parsed and parsed[0] in LOCAL_VAR_OPCODES:
+            result = max(result, int(parsed[1].split()[0]) + 1)
+        elif parsed and parsed[0][1:-2] in ('load', 'store'):
+            # short forms as iload_1
+            result = max(result, int(parsed[0][-1]) + 1)
+    return result
@@ -3,15 +3,39 @@
 
 __author__ = 'Oleg Beloglazov'
 
-import error_processor, jcodemaker
+import error_processor, jcodemaker, jescape, ll_profile
 from globals import *
 
 
+class Condition:
+    """ Boolean value computed by jumps: execution falls through if it is true and jumps to one of false_labels
+    if it is false. Commands of code maker from tail_index materialize it as 0/1 on stack for value consumers,
+    condition consumers (if, while, and, or, not) remove them and use jumps directly. """
+
+    def __init__(self, code_maker, false_labels, jump_index=None):
+        self.code_maker = code_maker
+        self.false_labels = false_labels
+        self.jump_index = jump_index    # index of single jump instruction to false label, if any
+        self.tail_index = len(code_maker.commands)
+        self.stack_size = code_maker.stack_size
+        self.end_index = None
+
+
 class JTranslator:
 
-    DEFAULT_STACK_SIZE = 100
+    INVERTED_JUMPS = {
+        'ifeq': 'ifne', 'ifne': 'ifeq',
+        'if_icmpeq': 'if_icmpne', 'if_icmpne': 'if_icmpeq',
+        'if_icmplt': 'if_icmpge', 'if_icmpge': 'if_icmplt',
+        'if_icmpgt': 'if_icmple', 'if_icmple': 'if_icmpgt',
+    }
+
+    def __init__(self, opt_level=1, tail_calls=True, profile=None, instrument=False):
+        self.opt_level = opt_level
+        self.tail_calls = tail_calls    # replace self tail calls with jumps to method start
+        self.instrument = instrument    # count calls and loop iterations at runtime
+        self.profile = profile or ll_profile.NullProfile()
 
-    def __init__(self):
         self.functions_jcode = []
         self.scopes_stack = []
         self.walker = None
@@ -19,6 +43,20 @@ class JTranslator:
         self.while_stack = []
         self.for_stack = []
         self.if_stack = []
+        self.and_stack = []
+        self.or_stack = []
+        self.list_maker_stack = []
+        self.list_maker_arg_start_stack = []
+        self.additive_stack = []    # (concatenation taken as left operand or None, start of right operand code)
+
+        self.constant_arrays = []   # [(field_name, values)]
+        self.counter_names = []     # "group:name" of runtime counters, index is counter number
+        self.global_free_methods = set(jcodemaker.BUILTIN_FUNCTIONS)   # methods which don't touch global lists
+
+        self.condition = None   # last made Condition
+        self.slice_end = None   # (code_maker, commands number) after last slice expression
+        self.concat_end = None  # (code_maker, code start, commands number, operand types) of last concatenation
+        self.self_call_end = None   # (code_maker, commands number, params jtypes) after last call of current function
 
     def enter_scope(self, scope):
         self.scopes_stack.append(scope)
@@ -41,22 +79,49 @@ class JTranslator:
             symbol = symbol.parent.children[0]
         return symbol.getLine(), symbol.getCharPositionInLine()
 
+    def add_hidden_var(self, name, var_type):
+        """ Returns number of variable which can't be referenced from source, variable of var_type freed by
+        free_hidden_var is taken again, so sibling loops and expressions don't add variables """
+        free_vars = self.scope.free_hidden_vars.get(var_type)
+        if free_vars:
+            return free_vars.pop()
+        var_id = '$%s%i' % (name, len(self.scope.vars))  # ids in source can't contain "$"
+        self.scope.add_var(var_id, var_type)
+        return self.get_var_number(var_id)
+
+    def free_hidden_var(self, var_number, var_type):
+        """ Gives hidden variable back to its scope when code using it is made """
+        self.scope.free_hidden_vars.setdefault(var_type, []).append(var_number)
+
     def get_var_number(self, var_id):
         try:
-            var_number = self.scope.vars.index(var_id)
-        except ValueError:
+            var_number = self.scope.var_numbers[var_id]
+        except KeyError:
             raise error_processor.UnsupportedOperation(
                 self.get_rule_position(),
                 'Undefined ID "%s".' % var_id
             )
         return RESERVED_LOCALS + var_number
 
+    def add_counter(self, group, name):
+        """ Adds runtime counter of instrumented program, returns its number """
+        counter_name = '%s:%s' % (group, name)
+        number = 1
+        while counter_name in self.counter_names:
+            # loops on one line
+            number += 1
+            counter_name = '%s:%s #%i' % (group, name, number)
+        self.counter_names.append(counter_name)
+        return len(self.counter_names) - 1
+
     # RULES
 
     def program(self):
-        return self.code_maker.make_class(
-            self.DEFAULT_STACK_SIZE, RESERVED_LOCALS + len(self.scope.vars), ''.join(self.functions_jcode)
-        )
+        with self.profile.phase('make_class'):
+            return self.code_maker.make_class(
+                ''.join(self.functions_jcode), self.constant_arrays, self.opt_level,
+                self.counter_names if self.instrument else None
+            )
 
     def function(self, f_params, f_scope):
         f_id = f_scope.scope_name
@@ -71,13 +136,18 @@ class JTranslator:
             )
 
         f_translated_params = [type_map[type] for id, type in f_params]
+        f_code_name = self.scope.get_function_code_name(f_id)
+        counter = self.add_counter('calls', f_code_name) if self.instrument else None
         f_jcode = f_scope.code_maker.make_method(
-            self.scope.get_function_code_name(f_id), f_translated_params,
-            self.DEFAULT_STACK_SIZE, RESERVED_LOCALS + len(f_scope.vars)
+            f_code_name, f_translated_params, opt_level=self.opt_level, counter=counter,
+            global_free_methods=self.global_free_methods
         )
         self.functions_jcode.append(f_jcode)
+        if self.opt_level >= 1 and jescape.is_global_free(
+                f_scope.code_maker.commands, f_code_name, self.global_free_methods):
+            self.global_free_methods.add(f_code_name)
 
-    def for_operation_begin(self, iter_id, value_type): # stack: 1
+    def for_operation_begin(self, iter_id, value_type, line): # stack: 1
         if value_type != LIST:
             raise error_processor.UnsupportedOperation(
                 self.get_rule_position(), '"for" operation with "in" type %s is unsupported' % value_type
@@ -87,78 +157,118 @@ class JTranslator:
         for_end_label = self.code_maker.make_label(self.scope.scope_number, 'FOR_END')
 
 
+        is_slice_loop = self.opt_level >= 1 and self.take_slice()
+
         self.code_maker.command_comment('for_operation_begin')
 
-        self.code_maker.command_ldc(0)  # iterator
-        # stack: 2 (list, iter)
+        if is_slice_loop:
+            hidden_vars = self.for_range_begin(iter_id, for_begin_label, for_end_label)
+            stack_values = 0
+        else:
+            self.for_cursor_begin(iter_id, for_begin_label, for_end_label)
+            hidden_vars = []
+            stack_values = 1
+        if self.instrument:
+            self.code_maker.command_counter_hit(self.add_counter('loops', 'for line %i' % line))
+
+        cleaner = jcodemaker.StackCleaner(self.code_maker)
+        self.for_stack.append([for_begin_label, for_end_label, cleaner, stack_values, hidden_vars])
+
+    def for_cursor_begin(self, iter_id, for_begin_label, for_end_label): # stack: 1
+        # loop iterates over snapshot of the list made on loop entry,
+        # changes of the list in loop body don't affect iteration
+        self.code_maker.list.cursor()
+        # stack: 1 (cursor)
         self.code_maker.command_label(for_begin_label)
-        self.code_maker.command_store(INTEGER_JTYPE, TEMPORARY_STORE_VAR_1)  # save iterator
-        self.code_maker.command_dup()  # duplicate list
-        self.code_maker.list.len()
-        self.code_maker.command_load(INTEGER_JTYPE, TEMPORARY_STORE_VAR_1)
-        # stack: 3 (list, list_len, iter)
-        self.code_maker.command_if_icmple(for_end_label)
+        self.code_maker.command_dup()
+        self.code_maker.list.boolean_value()
+        self.code_maker.command_ifeq(for_end_label)
+        # stack: 1 (cursor)
+        self.code_maker.command_dup()
+        self.code_maker.list.next()
+        # stack: 2 (cursor, element)
+        self.assignment_expr(iter_id, ELEMENT)
+        # stack: 1 (cursor)
+
+    def for_range_begin(self, iter_id, for_begin_label, for_end_label): # stack: 3
+        """ Loop over l[begin:end] reads elements of l directly, without making slice,
+        returns [(var_number, var_type)] of hidden variables used by loop """
+        data_var = self.add_hidden_var('for_data', LIST)
+        position_var = self.add_hidden_var('for_position', ELEMENT)
+        count_var = self.add_hidden_var('for_count', ELEMENT)
+
+        # stack: 3 (list, begin, end)
+        self.code_maker.command_store(INTEGER_JTYPE, count_var)
+        self.code_maker.command_store(INTEGER_JTYPE, position_var)
+        self.code_maker.command_dup()
+        self.code_maker.command_load(INTEGER_JTYPE, position_var)
+        self.code_maker.command_load(INTEGER_JTYPE, count_var)
+        self.code_maker.list.range_length()
+        self.code_maker.command_store(INTEGER_JTYPE, count_var)
         # stack: 1 (list)
-        self.code_maker.command_dup()  # duplicate list
-        self.code_maker.command_load(INTEGER_JTYPE, TEMPORARY_STORE_VAR_1)
-        self.code_maker.list.get()
-        # stack: 2 (list, element)
-        self.code_maker.command_load(INTEGER_JTYPE, TEMPORARY_STORE_VAR_1)
-        self.code_maker.command_swap()
-        # stack: 3 (list, iter, element)
+        self.code_maker.command_dup()
+        self.code_maker.command_load(INTEGER_JTYPE, position_var)
+        self.code_maker.list.position()
+        self.code_maker.command_store(INTEGER_JTYPE, position_var)
+        # pinned array is never changed, so loop iterates over snapshot as for_cursor_begin
+        self.code_maker.list.pin()
+        self.code_maker.command_store(INT_ARRAY_JTYPE, data_var)
+        # stack: 0
+        self.code_maker.command_label(for_begin_label)
+        self.code_maker.command_load(INTEGER_JTYPE, count_var)
+        self.code_maker.command_ifle(for_end_label)
+        self.code_maker.command_iinc(count_var, -1)
+        self.code_maker.command_load(INT_ARRAY_JTYPE, data_var)
+        self.code_maker.command_load(INTEGER_JTYPE, position_var)
+        self.code_maker.list.at()
+        self.code_maker.command_iinc(position_var, 1)
+        # stack: 1 (element)
         self.assignment_expr(iter_id, ELEMENT)
-        # stack: 2 (list, iter)
-
-        cleaner = jcodemaker.StackCleaner(self.code_maker)
-        self.for_stack.append([for_begin_label, for_end_label, cleaner])
+        # stack: 0
+        return [(data_var, LIST), (position_var, ELEMENT), (count_var, ELEMENT)]
 
     def for_operation(self):
-        for_begin_label, for_end_label, cleaner = self.for_stack.pop()
+        for_begin_label, for_end_label, cleaner, stack_values, hidden_vars = self.for_stack.pop()
 
         self.code_maker.command_comment('for_operation_end')
 
         cleaner.cleanup()
 
-        # stack: 2 (list, iter)
-        self.code_maker.command_ldc(1)
-        self.code_maker.command_iadd()
-        # stack: 2 (list, iter)
         self.code_maker.command_goto(for_begin_label)
 
         self.code_maker.command_label(for_end_label)
-        self.code_maker.stack_size -= 1
-        # stack: 1 (list)
-        self.code_maker.command_pop()   # pop out iterating list from stack
+        if stack_values:
+            # stack: 1 (cursor)
+            self.code_maker.command_pop()   # pop out cursor from stack
+        for var_number, var_type in hidden_vars:
+            self.free_hidden_var(var_number, var_type)
 
-    def while_operation_begin(self): # stack: 0
+    def while_operation_begin(self, line): # stack: 0
         while_begin_label = self.code_maker.make_label(self.scope.scope_number, 'WHILE_BEGIN')
-        while_end_label = self.code_maker.make_label(self.scope.scope_number, 'WHILE_END')
+        counter = self.add_counter('loops', 'while line %i' % line) if self.instrument else None
 
         self.code_maker.command_comment('while_operation_begin')
         self.code_maker.command_label(while_begin_label)
         # stack: 0
 
-        self.while_stack.append([while_begin_label, while_end_label, None])
+        self.while_stack.append([while_begin_label, None, None, counter])
         
     def while_operation_value(self, value_type): # stack: 1
-        while_end_label = self.while_stack[-1][1]
+        while_end_labels = self.condition_false_labels(value_type)
+        # stack: 0
 
         self.code_maker.command_comment('while_operation_value')
-
-        # stack: 1 (value)
-        if value_type == LIST:
-            self.code_maker.list.to_int()
-        # stack: 1 (element)
-            
-        self.code_maker.command_ifeq(while_end_label)
-        # stack: 0
+        counter = self.while_stack[-1][3]
+        if counter is not None:
+            self.code_maker.command_counter_hit(counter)
 
         cleaner = jcodemaker.StackCleaner(self.code_maker)
+        self.while_stack[-1][1] = while_end_labels
         self.while_stack[-1][2] = cleaner
 
         
     def while_operation(self): # stack: 0
-        while_begin_label, while_end_label, cleaner = self.while_stack.pop()
+        while_begin_label, while_end_labels, cleaner, counter = self.while_stack.pop()
 
         self.code_maker.command_comment('while_operation')
 
@@ -166,33 +276,27 @@ class JTranslator:
         # stack: 0
         self.code_maker.command_goto(while_begin_label)
 
-        self.code_maker.command_label(while_end_label)
+        for label in while_end_labels:
+            self.code_maker.command_label(label)
         # stack: 0
         
     def if_operation_value(self, value_type, is_elif=False): # stack: 1
-        else_label = self.code_maker.make_label(self.scope.scope_number, 'ELSE')
+        else_labels = self.condition_false_labels(value_type)
+        # stack: 0
 
         self.code_maker.command_comment('if_operation_value')
 
-        # stack: 1 (value)
-        if value_type == LIST:
-            self.code_maker.list.to_int()
-        # stack: 1 (element)
-            
-        self.code_maker.command_ifeq(else_label)
-        # stack: 0
-
         cleaner = jcodemaker.StackCleaner(self.code_maker)
 
         if is_elif:
-            self.if_stack[-1][1] = else_label
+            self.if_stack[-1][1] = else_labels
             self.if_stack[-1][2] = cleaner
         else:
             if_end_label = self.code_maker.make_label(self.scope.scope_number, 'IF_END')
-            self.if_stack.append([if_end_label, else_label, cleaner])
+            self.if_stack.append([if_end_label, else_labels, cleaner])
 
     def if_operation_else(self):
-        if_end_label, else_label, cleaner = self.if_stack[-1]
+        if_end_label, else_labels, cleaner = self.if_stack[-1]
 
         self.code_maker.command_comment('if_operation_else')
         cleaner.cleanup()
@@ -200,11 +304,12 @@ class JTranslator:
         # stack: 0
         self.code_maker.command_goto(if_end_label)
 
-        self.code_maker.command_label(else_label)
+        for label in else_labels:
+            self.code_maker.command_label(label)
         # stack: 0
 
     def if_operation(self):
-        if_end_label, else_label, cleaner = self.if_stack.pop()
+        if_end_label, else_labels, cleaner = self.if_stack.pop()
 
         self.code_maker.command_comment('if_operation')
         cleaner.cleanup()
@@ -214,18 +319,49 @@ class JTranslator:
     def print_value(self, value_type):
         self.code_maker.command_comment('print_value ' + value_type)
         if value_type == ELEMENT:
-            self.code_maker.command_invokestatic(TARGET_CLASS_NAME, 'print', [INTEGER_JTYPE], VOID_JTYPE)
+            self.code_maker.command_invokestatic(IO_CLASS, 'print', [INTEGER_JTYPE], VOID_JTYPE)
         elif value_type == LIST:
             self.code_maker.list.print_list()
         self.code_maker.command_ldc('" "')
-        self.code_maker.command_invokestatic(TARGET_CLASS_NAME, 'print', [STRING_JTYPE], VOID_JTYPE)
+        self.code_maker.command_invokestatic(IO_CLASS, 'print', [STRING_JTYPE], VOID_JTYPE)
 
     def print_operation(self):
         self.code_maker.command_comment('print_operation')
         self.code_maker.command_ldc('"\\n"')
-        self.code_maker.command_invokestatic(TARGET_CLASS_NAME, 'print', [STRING_JTYPE], VOID_JTYPE)
+        self.code_maker.command_invokestatic(IO_CLASS, 'print', [STRING_JTYPE], VOID_JTYPE)
+
+    def take_self_call(self):
+        """ Removes call of current function if it's the last code made, returns its params jtypes or None """
+        if not self.self_call_end:
+            return None
+        code_maker, commands_number, params_jtypes = self.self_call_end
+        self.self_call_end = None
+        if code_maker is not self.code_maker or len(code_maker.commands) != commands_number:
+            return None
+        del code_maker.commands[-1]
+        code_maker.stack_size += len(params_jtypes) - 1
+        return params_jtypes
+
+    def tail_call_operation(self, params_jtypes):
+        """ Moves args of removed self call to method params and jumps to method start """
+        self.code_maker.command_comment('tail_call_operation')
+        for i in reversed(xrange(len(params_jtypes))):
+            self.code_maker.command_store(params_jtypes[i], i)
+        # values left on stack by enclosing statements (as for cursor)
+        jcodemaker.StackCleaner(self.code_maker).cleanall()
+        self.code_maker.start_label_used = True
+        self.code_maker.command_goto(self.code_maker.start_label)
+        # code after this point is unreachable, stack is counted as after return_operation
+        self.code_maker.stack_size = 1
 
     def return_operation(self, value_type):
+        if self.tail_calls and value_type and not self.scope.is_global():
+            params_jtypes = self.take_self_call()
+            if params_jtypes is not None:
+                self.__set_function_return_type(value_type)
+                self.tail_call_operation(params_jtypes)
+                return
+
         if self.scope.is_global():
             required_stack_size = 0
         else:
@@ -262,7 +398,7 @@ class JTranslator:
                 self.get_rule_position(),
                 'using global operation for variable %s in global scope.' % var_id
             )
-        if var_id not in self.scopes_stack[0].vars:
+        if var_id not in self.scopes_stack[0].var_numbers:
             raise error_processor.UndefinedIDException(
                 self.get_rule_position(),
                 'variable "%s" not defined in global scope.' % (var_id)
@@ -274,14 +410,14 @@ class JTranslator:
             field_name = self.code_maker.make_field_name(var_id)
             field_jtype = type_map[value_type]
 
-            if not var_id in self.scope.vars:
+            if not var_id in self.scope.var_numbers:
                 self.code_maker.add_static_field(field_name, field_jtype)
                 self.scope.add_var(var_id, value_type)
 
             self.code_maker.command_putstatic(TARGET_CLASS_NAME, field_name, field_jtype)
 
         else:
-            if not var_id in self.scope.vars:
+            if not var_id in self.scope.var_numbers:
                 self.scope.add_var(var_id, value_type)
 
             if var_id in self.scope.global_vars:
@@ -294,74 +430,101 @@ class JTranslator:
                 self.code_maker.command_comment('assignment %s = %s' % (var_id, value_type))
                 self.code_maker.command_store(type_map[value_type], self.get_var_number(var_id))
 
-    # RVALUES (returns value type)
+    # CONDITIONS
 
-    def or_expr(self, type1, type2):
-        self.code_maker.command_comment('or_expr %s or %s' % (type1, type2))
-        if type2 == LIST:
-            self.code_maker.list.to_int()
-        if type1 == LIST:
-            self.code_maker.command_swap()
+    def make_condition(self, false_labels, jump_index=None):
+        """ Registers condition which code ends here and adds its materializing tail """
+        condition = Condition(self.code_maker, false_labels, jump_index)
+
+        end_label = self.code_maker.make_label(self.scope.scope_number, 'COND_END')
+        self.code_maker.command_ldc(1)
+        self.code_maker.command_goto(end_label)
+        for label in false_labels:
+            self.code_maker.command_label(label)
+        self.code_maker.command_ldc(0)
+        self.code_maker.command_label(end_label)
+        self.code_maker.stack_size -= 1
+
+        condition.end_index = len(self.code_maker.commands)
+        self.condition = condition
+
+    def take_condition(self):
+        """ Returns Condition for value on top of stack and removes its materializing tail,
+        None if the value isn't a condition or any code was added after it """
+        condition = self.condition
+        self.condition = None
+        if condition and condition.code_maker is self.code_maker and \
+                condition.end_index == len(self.code_maker.commands):
+            del self.code_maker.commands[condition.tail_index:]
+            self.code_maker.stack_size = condition.stack_size
+            return condition
+        return None
+
+    def condition_false_labels(self, value_type):
+        """ Consumes value on top of stack as condition, returns labels where execution jumps if it is false """
+        condition = self.take_condition()
+        if condition:
+            return condition.false_labels
+
+        if value_type == LIST:
             self.code_maker.list.to_int()
-            self.code_maker.command_swap()
+        false_label = self.code_maker.make_label(self.scope.scope_number, 'FALSE')
+        self.code_maker.command_ifeq(false_label)
+        return [false_label]
+
+    def take_slice(self):
+        """ Removes call of slice if it's the last command, so list, begin and end stay on stack """
+        slice_end = self.slice_end
+        self.slice_end = None
+        if slice_end == (self.code_maker, len(self.code_maker.commands)):
+            self.code_maker.commands.pop()
+            self.code_maker.stack_size += 2
+            return True
+        return False
 
-        true1_label = self.code_maker.make_label(self.scope.scope_number, 'OR_TRUE1')
-        true2_label = self.code_maker.make_label(self.scope.scope_number, 'OR_TRUE2')
-        or_end_label = self.code_maker.make_label(self.scope.scope_number, 'OR_END')
+    # RVALUES (returns value type)
 
-        self.code_maker.command_swap()
-        self.code_maker.command_ifne(true1_label)
-        self.code_maker.command_ifne(true2_label)
-        self.code_maker.command_ldc(0)
-        self.code_maker.command_goto(or_end_label)
-        self.code_maker.command_label(true1_label)
-        self.code_maker.command_pop()
-        self.code_maker.command_label(true2_label)
-        self.code_maker.command_ldc(1)
-        self.code_maker.command_label(or_end_label)
+    def or_expr_left(self, type1):
+        """ Calls between operands of or_expr, right operand is evaluated only if left one is false """
+        left_false_labels = self.condition_false_labels(type1)
+        self.code_maker.command_comment('or_expr_left %s' % type1)
+
+        true_label = self.code_maker.make_label(self.scope.scope_number, 'OR_TRUE')
+        self.code_maker.command_goto(true_label)
+        for label in left_false_labels:
+            self.code_maker.command_label(label)
+        self.or_stack.append(true_label)
 
+    def or_expr(self, type1, type2):
+        right_false_labels = self.condition_false_labels(type2)
+        self.code_maker.command_comment('or_expr %s or %s' % (type1, type2))
+
+        self.code_maker.command_label(self.or_stack.pop())
+        self.make_condition(right_false_labels)
         return ELEMENT
 
+    def and_expr_left(self, type1):
+        """ Calls between operands of and_expr, right operand is evaluated only if left one is true """
+        self.and_stack.append(self.condition_false_labels(type1))
+        self.code_maker.command_comment('and_expr_left %s' % type1)
+
     def and_expr(self, type1, type2):
+        right_false_labels = self.condition_false_labels(type2)
         self.code_maker.command_comment('and_expr %s and %s' % (type1, type2))
-        if type2 == LIST:
-            self.code_maker.list.to_int()
-        if type1 == LIST:
-            self.code_maker.command_swap()
-            self.code_maker.list.to_int()
-            self.code_maker.command_swap()
-
-        false1_label = self.code_maker.make_label(self.scope.scope_number, 'AND_FALSE1')
-        false2_label = self.code_maker.make_label(self.scope.scope_number, 'AND_FALSE')
-        and_end_label = self.code_maker.make_label(self.scope.scope_number, 'AND_END')
-
-        self.code_maker.command_swap()
-        self.code_maker.command_ifeq(false1_label)
-        self.code_maker.command_ifeq(false2_label)
-        self.code_maker.command_ldc(1)
-        self.code_maker.command_goto(and_end_label)
-        self.code_maker.command_label(false1_label)
-        self.code_maker.command_pop()
-        self.code_maker.command_label(false2_label)
-        self.code_maker.command_ldc(0)
-        self.code_maker.command_label(and_end_label)
 
+        self.make_condition(self.and_stack.pop() + right_false_labels)
         return ELEMENT
 
     def equality_expr(self, operator, type1, type2):
         self.code_maker.command_comment('equality_expr %s %s %s' % (type1, operator, type2))
         if type1 == type2 == ELEMENT:
-            eq_true_label = self.code_maker.make_label(self.scope.scope_number, 'EQ_TRUE')
-            eq_end_label = self.code_maker.make_label(self.scope.scope_number, 'EQ_END')
-
-            self.code_maker.command_if_icmpeq(eq_true_label)
-            self.code_maker.command_ldc(0)
-            self.code_maker.command_goto(eq_end_label)
-            self.code_maker.command_label(eq_true_label)
-            self.code_maker.command_ldc(1)
-            self.code_maker.command_label(eq_end_label)
-
-            self.code_maker.stack_size -= 1
+            false_label = self.code_maker.make_label(self.scope.scope_number, 'EQ_FALSE')
+            if operator == '==':
+                self.code_maker.command_if_icmpne(false_label)
+            else:
+                self.code_maker.command_if_icmpeq(false_label)
+            self.make_condition([false_label], len(self.code_maker.commands) - 1)
+            return ELEMENT
 
         elif type1 == type2 == LIST:
             self.code_maker.list.equal()
@@ -384,47 +547,114 @@ class JTranslator:
                 'Relational operation (%s) for lists is unsupported.' % operator
             )
 
-        rel_true_label = self.code_maker.make_label(self.scope.scope_number, 'REL_TRUE')
-        rel_end_label = self.code_maker.make_label(self.scope.scope_number, 'REL_END')
-
-        if operator == '<': self.code_maker.command_if_icmplt(rel_true_label)
-        elif operator == '<=': self.code_maker.command_if_icmple(rel_true_label)
-        elif operator == '>': self.code_maker.command_if_icmpgt(rel_true_label)
-        elif operator == '>=': self.code_maker.command_if_icmpge(rel_true_label)
+        # jump if relation is false
+        false_label = self.code_maker.make_label(self.scope.scope_number, 'REL_FALSE')
 
-        self.code_maker.command_ldc(0)
-        self.code_maker.command_goto(rel_end_label)
-        self.code_maker.command_label(rel_true_label)
-        self.code_maker.command_ldc(1)
-        self.code_maker.command_label(rel_end_label)
+        if operator == '<': self.code_maker.command_if_icmpge(false_label)
+        elif operator == '<=': self.code_maker.command_if_icmpgt(false_label)
+        elif operator == '>': self.code_maker.command_if_icmple(false_label)
+        elif operator == '>=': self.code_maker.command_if_icmplt(false_label)
 
-        self.code_maker.stack_size -= 1
+        self.make_condition([false_label], len(self.code_maker.commands) - 1)
 
         return ELEMENT
 
+    def take_concat(self):
+        """ Removes code of last concatenation if it's the last code made and leaves its operands on stack,
+        returns (operand types, removed commands) or None """
+        if not self.concat_end or self.opt_level < 1:
+            return None
+        code_maker, code_start, commands_number, types = self.concat_end
+        self.concat_end = None
+        if code_maker is not self.code_maker or len(code_maker.commands) != commands_number:
+            return None
+        removed_commands = code_maker.commands[code_start:]
+        del code_maker.commands[code_start:]
+        code_maker.stack_size += len(types) - 1
+        return types, removed_commands
+
+    def restore_concat(self, concat, position):
+        """ Puts code removed by take_concat back to position of commands """
+        types, removed_commands = concat
+        self.code_maker.commands[position:position] = removed_commands
+        self.code_maker.stack_size -= len(types) - 1
+
+    def concat_expr(self, types):
+        """ Concatenates values of types from stack into new list sized once, every value is copied once """
+        code_start = len(self.code_maker.commands)
+        if types == [LIST, LIST]:
+            self.code_maker.list.concat()
+        else:
+            # values are moved to variables, they are live only inside this code
+            vars_numbers = [self.add_hidden_var('concat', value_type) for value_type in types]
+            for var_number, value_type in reversed(zip(vars_numbers, types)):
+                self.code_maker.command_store(type_map[value_type], var_number)
+
+            self.code_maker.command_ldc(types.count(ELEMENT))
+            for var_number, value_type in zip(vars_numbers, types):
+                if value_type == LIST:
+                    self.code_maker.command_load(INTEGER_LIST_JTYPE, var_number)
+                    self.code_maker.list.len()
+                    self.code_maker.command_iadd()
+            self.code_maker.list.with_capacity()
+
+            for var_number, value_type in zip(vars_numbers, types):
+                self.code_maker.command_dup()
+                self.code_maker.command_load(type_map[value_type], var_number)
+                if value_type == LIST:
+                    self.code_maker.list.append_all()
+                else:
+                    self.code_maker.list.addLast()
+            for var_number, value_type in zip(vars_numbers, types):
+                self.free_hidden_var(var_number, value_type)
+        self.concat_end = (self.code_maker, code_start, len(self.code_maker.commands), types)
+        return LIST
+
+    def additive_expr_left(self, operator, type1):
+        left_concat = None
+        if operator == '+' and type1 == LIST:
+            left_concat = self.take_concat()
+        # right operand code starts here
+        self.additive_stack.append((left_concat, len(self.code_maker.commands)))
+
     def additive_expr(self, operator, type1, type2):
+        # new list made by concatenation isn't visible to other code, so chains of concatenations and
+        # additions of elements to it are made by one concatenation
+        left_concat, right_start = self.additive_stack.pop()
+        right_concat = None
+        if operator == '+' and type2 == LIST:
+            right_concat = self.take_concat()
+        if left_concat and jescape.mutates_lists(self.code_maker.commands[right_start:], self.global_free_methods):
+            # operands of left concatenation are kept on stack as references, so they must be copied
+            # before right operand changes them, as a + b + (a + 1) does
+            self.restore_concat(left_concat, right_start)
+            left_concat = None
+        left_types = left_concat and left_concat[0]
+        right_types = right_concat and right_concat[0]
+
         self.code_maker.command_comment('additive_expr %s %s %s' % (type1, operator, type2))
         if operator == '+':
-            if type1 == type2 == ELEMENT:
+            if left_types or right_types:
+                return self.concat_expr((left_types or [type1]) + (right_types or [type2]))
+            elif type1 == type2 == ELEMENT:
                 self.code_maker.command_iadd()
                 return ELEMENT
             elif type1 == type2 == LIST:
-                self.code_maker.list.concat()
-                return LIST
+                return self.concat_expr([LIST, LIST])
             elif type1 == ELEMENT and type2 == LIST:
                 self.code_maker.command_dup()
-                self.code_maker.command_store(INTEGER_LIST_JTYPE, 0)
+                self.code_maker.command_store(INTEGER_LIST_JTYPE, TEMPORARY_STORE_VAR_1)
                 self.code_maker.command_swap()
                 self.code_maker.list.addFirst()
-                self.code_maker.command_load(INTEGER_LIST_JTYPE, 0)
+                self.code_maker.command_load(INTEGER_LIST_JTYPE, TEMPORARY_STORE_VAR_1)
                 return LIST
             elif type1 == LIST and  type2 == ELEMENT:
                 self.code_maker.command_swap()
                 self.code_maker.command_dup()
-                self.code_maker.command_store(INTEGER_LIST_JTYPE, 0)
+                self.code_maker.command_store(INTEGER_LIST_JTYPE, TEMPORARY_STORE_VAR_1)
                 self.code_maker.command_swap()
                 self.code_maker.list.addLast()
-                self.code_maker.command_load(INTEGER_LIST_JTYPE, 0)
+                self.code_maker.command_load(INTEGER_LIST_JTYPE, TEMPORARY_STORE_VAR_1)
                 return LIST
         elif operator == '-':
             if type1 == type2 == ELEMENT:
@@ -461,10 +691,10 @@ class JTranslator:
             elif type1 == LIST and type2 == ELEMENT:
                 self.code_maker.command_swap()
                 self.code_maker.command_dup()
-                self.code_maker.command_store(INTEGER_LIST_JTYPE, 0)
+                self.code_maker.command_store(INTEGER_LIST_JTYPE, TEMPORARY_STORE_VAR_1)
                 self.code_maker.command_swap()
                 self.code_maker.list.delete()
-                self.code_maker.command_load(INTEGER_LIST_JTYPE, 0)
+                self.code_maker.command_load(INTEGER_LIST_JTYPE, TEMPORARY_STORE_VAR_1)
                 return LIST
 
         raise error_processor.UnsupportedOperation(
@@ -520,14 +750,30 @@ class JTranslator:
         )
 
     def not_expr(self, value_type):
+        condition = self.take_condition()
         self.code_maker.command_comment('not_expr not %s' % value_type)
-        if value_type == LIST:
-            self.code_maker.list.to_int()
 
-        false_label = self.code_maker.make_label(self.scope.scope_number, 'BOOL_FALSE')
-        end_label = self.code_maker.make_label(self.scope.scope_number, 'BOOL_END')
+        if condition and condition.jump_index is not None:
+            # invert the only jump of condition
+            commands = self.code_maker.commands
+            opcode, label = commands[condition.jump_index].split()
+            commands[condition.jump_index] = '%s %s' % (self.INVERTED_JUMPS[opcode], label)
+            self.make_condition(condition.false_labels, condition.jump_index)
+
+        elif condition:
+            # swap fall through and false labels
+            false_label = self.code_maker.make_label(self.scope.scope_number, 'NOT_FALSE')
+            self.code_maker.command_goto(false_label)
+            for label in condition.false_labels:
+                self.code_maker.command_label(label)
+            self.make_condition([false_label])
 
-        self.code_maker.command_invokestatic(TARGET_CLASS_NAME, 'neg', [INTEGER_JTYPE], INTEGER_JTYPE)
+        else:
+            if value_type == LIST:
+                self.code_maker.list.to_int()
+            false_label = self.code_maker.make_label(self.scope.scope_number, 'NOT_FALSE')
+            self.code_maker.command_ifne(false_label)
+            self.make_condition([false_label], len(self.code_maker.commands) - 1)
 
         return ELEMENT
 
@@ -565,6 +811,8 @@ class JTranslator:
             self.code_maker.command_invokestatic(
                 TARGET_CLASS_NAME, jmethod_id, f_translated_params, type_map[func_type]
             )
+            if len(self.scopes_stack) > 1 and scope is self.scopes_stack[-2] and func_id == self.scope.scope_name:
+                self.self_call_end = (self.code_maker, len(self.code_maker.commands), f_translated_params)
             return func_type  # function return type
         else:
             raise error_processor.FunctionUnfoundException(
@@ -578,15 +826,15 @@ class JTranslator:
         if value_type == target_type:
             return target_type
         elif value_type == ELEMENT and target_type == LIST:
-            # temporary store value to var 0
-            self.code_maker.command_store(INTEGER_JTYPE, 0)
+            # temporary store value
+            self.code_maker.command_store(INTEGER_JTYPE, TEMPORARY_STORE_VAR_1)
 
             # create list
             self.code_maker.list.new()
 
             # load value and call add method
             self.code_maker.command_dup()
-            self.code_maker.command_load(INTEGER_JTYPE, 0)
+            self.code_maker.command_load(INTEGER_JTYPE, TEMPORARY_STORE_VAR_1)
             self.code_maker.list.addLast()
             return LIST
         elif value_type == LIST and target_type == ELEMENT:
@@ -601,6 +849,7 @@ class JTranslator:
                 return ELEMENT
             elif value_type1 == ELEMENT and value_type2 == ELEMENT:
                 self.code_maker.list.slice()
+                self.slice_end = (self.code_maker, len(self.code_maker.commands))
                 return LIST
 
         raise error_processor.UnsupportedOperation(
@@ -611,31 +860,77 @@ class JTranslator:
 
     def list_maker_begin(self):
         """ Calls first for list_maker rule, before args """
+        start_index = len(self.code_maker.commands)
+        stack_size = self.code_maker.stack_size
         self.code_maker.command_comment('list_maker_begin')
 
-        self.code_maker.list.new()
-        self.code_maker.command_dup()  # additional copy for args
+        # args are stored to int array, its size is known only after last arg
+        size_command_index = len(self.code_maker.commands)
+        self.code_maker.command_ldc(0)
+        self.code_maker.command_newarray_int()
+
+        # [start_index, stack_size, size_command_index, constant_values (None if not constant), args_number]
+        self.list_maker_stack.append([start_index, stack_size, size_command_index, [], 0])
+
+    def list_maker_arg_begin(self):
+        """ Calls for every arg, before it """
+        self.code_maker.command_comment('list_maker_arg_begin')
+
+        # stack: 3 (array, array, index)
+        self.code_maker.command_dup()
+        self.code_maker.command_ldc(self.list_maker_stack[-1][4])
+        self.list_maker_arg_start_stack.append(len(self.code_maker.commands))
 
     def list_maker_arg(self, arg_type):
         """ Calls for every arg """
-        self.code_maker.command_comment('list_maker_arg')
-
         if arg_type != ELEMENT:
             raise error_processor.UnsupportedOperation(
                 self.get_rule_position(),
                 'Making list of lists is unsupported.'
             )
 
-        self.code_maker.list.addLast()
-        self.code_maker.command_dup()
+        list_maker_state = self.list_maker_stack[-1]
+        arg_start_index = self.list_maker_arg_start_stack.pop()
+        constant_values = list_maker_state[3]
+        if constant_values is not None:
+            arg_commands = self.code_maker.commands[arg_start_index:]
+            if len(arg_commands) == 1 and arg_commands[0].startswith('ldc ') and arg_commands[0][4:].isdigit():
+                constant_values.append(int(arg_commands[0][4:]))
+            else:
+                list_maker_state[3] = None
+
+        self.code_maker.command_comment('list_maker_arg')
+        # stack: 4 (array, array, index, element)
+        self.code_maker.command_iastore()
+        list_maker_state[4] += 1
 
     def list_maker(self):
         """ Calls last for list_maker rule, return type """
-        self.code_maker.command_comment('list_maker')
-
-        self.code_maker.command_pop()
+        start_index, stack_size, size_command_index, constant_values, args_number = self.list_maker_stack.pop()
+
+        if constant_values is not None:
+            # drop element by element code, list is copied from prebuilt array
+            del self.code_maker.commands[start_index:]
+            self.code_maker.stack_size = stack_size
+            self.code_maker.command_comment('list_maker constant')
+            if constant_values:
+                field_name = self.add_constant_array(constant_values)
+                self.code_maker.list.new_from_static_array(TARGET_CLASS_NAME, field_name)
+            else:
+                self.code_maker.list.new()
+        else:
+            self.code_maker.commands[size_command_index] = 'ldc %i' % args_number
+            self.code_maker.command_comment('list_maker')
+            # stack: 1 (array)
+            self.code_maker.list.new_from_array()
         return LIST
 
+    def add_constant_array(self, values):
+        """ Registers int array initialized on class loading, returns its field name """
+        field_name = 'const__%i' % len(self.constant_arrays)
+        self.constant_arrays.append((field_name, values))
+        return field_name
+
     def element_literal(self, value):
         self.code_maker.command_ldc(value)
         return ELEMENT
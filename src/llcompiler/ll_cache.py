@@ -0,0 +1,104 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+""" On-disk cache of compiled jar files
+
+Key is hash of source, compiler version and compile options. Least recently used files (by modification time,
+which is updated on every hit) are evicted when total size of cache is over the limit.
+"""
+
+import os
+import shutil
+import hashlib
+import tempfile
+
+
+CACHE_FILE_EXTENSION = '.jar'
+
+
+def files_hash(paths):
+    """ Hash of contents of files, used as compiler version """
+    digest = hashlib.sha1()
+    for path in sorted(paths):
+        digest.update(path.replace('\\', '/'))
+        with open(path, 'rb') as f:
+            digest.update(f.read())
+    return digest.hexdigest()
+
+
+class CompileCache:
+
+    def __init__(self, cache_dir, max_size):
+        """ max_size - max total size of cached files in bytes """
+        self.cache_dir = cache_dir
+        self.max_size = max_size
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        if not os.path.exists(cache_dir):
+            os.makedirs(cache_dir)
+
+    def make_key(self, source, compiler_version, options):
+        """ source - bytes of source file, options - list of values which change compiled code """
+        digest = hashlib.sha1()
+        digest.update(compiler_version)
+        digest.update(repr(options))
+        digest.update(source)
+        return digest.hexdigest()
+
+    def get_path(self, key):
+        return os.path.join(self.cache_dir, key + CACHE_FILE_EXTENSION)
+
+    def get(self, key, dest_filename):
+        """ Copies cached file to dest_filename, returns False if there is no such file """
+        path = self.get_path(key)
+        try:
+            shutil.copyfile(path, dest_filename)
+            os.utime(path, None)
+        except (IOError, OSError):
+            # missed or evicted by other process
+            self.misses += 1
+            return False
+        self.hits += 1
+        return True
+
+    def put(self, key, filename):
+        # write to temporary file first, so other processes never see partly written file
+        fd, temp_path = tempfile.mkstemp(dir=self.cache_dir)
+        os.close(fd)
+        shutil.copyfile(filename, temp_path)
+        path = self.get_path(key)
+        if os.path.exists(path):
+            os.remove(path)
+        os.rename(temp_path, path)
+        self.evict()
+
+    def evict(self):
+        """ Removes least recently used files until cache fits in max_size """
+        entries = []
+        total_size = 0
+        for name in os.listdir(self.cache_dir):
+            if not name.endswith(CACHE_FILE_EXTENSION):
+                continue
+            path = os.path.join(self.cache_dir, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+            total_size += stat.st_size
+
+        entries.sort()
+        for mtime, size, path in entries:
+            if total_size <= self.max_size:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total_size -= size
+            self.evictions += 1
+
+    def stats(self):
+        return 'cache: %i hits, %i misses, %i evicted' % (self.hits, self.misses, self.evictions)
@@ -0,0 +1,141 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+""" In-process compiler API
+
+All state of compile (errors, scopes, translator) is made by compile call, so it can be called repeatedly
+and from several threads:
+
+    result = ll_compiler.compile(source, ll_compiler.CompileOptions(opt_level=1))
+    if result.errors:
+        ...
+    class_name, class_bytes = result.class_name, result.class_bytes
+"""
+
+import antlr3
+import antlr3.tree
+
+import error_processor
+import jtrans
+import jframe
+import jclassfile
+import ll_profile
+import ListLangLexer
+import ListLangParser
+import ListLangWalker
+
+
+class CompileOptions:
+
+    def __init__(self, opt_level=1, tail_calls=True, assemble=True, keep_tokens=False, profile=False,
+                 instrument=False):
+        """ opt_level - 0 or 1 (see JCodeMaker.make_method), tail_calls - replace self tail calls with jumps,
+        assemble - make class file bytes, keep_tokens - keep lexer tokens in result,
+        profile - record ll_profile.Profile of compile in result,
+        instrument - make program count calls, loop iterations and list copies (see Counters.java) """
+        self.opt_level = opt_level
+        self.tail_calls = tail_calls
+        self.assemble = assemble
+        self.keep_tokens = keep_tokens
+        self.profile = profile
+        self.instrument = instrument
+
+    def __repr__(self):
+        return ('CompileOptions(opt_level=%r, tail_calls=%r, assemble=%r, keep_tokens=%r, profile=%r, '
+                'instrument=%r)' % (self.opt_level, self.tail_calls, self.assemble, self.keep_tokens, self.profile,
+                                    self.instrument))
+
+
+class CompileResult:
+
+    def __init__(self):
+        self.errors = []            # messages of lexical, syntax and semantic errors
+        self.tokens = None          # lexer tokens if options.keep_tokens
+        self.jasmin_code = None
+        self.class_name = None
+        self.class_bytes = None     # if options.assemble
+        self.profile = None         # ll_profile.Profile if options.profile
+
+    @property
+    def success(self):
+        return not self.errors and self.jasmin_code is not None
+
+
+class CompileError(Exception):
+    """ Raised by callers which need compiled code, keeps CompileResult """
+
+    def __init__(self, result):
+        Exception.__init__(self, '\n'.join(result.errors))
+        self.result = result
+
+
+def count_instructions(jasmin_code):
+    number = 0
+    for line in jasmin_code.splitlines():
+        parsed = jframe.parse_command(line)
+        if parsed and parsed[0] != 'label' and not parsed[0].startswith('.'):
+            number += 1
+    return number
+
+
+def compile(source, options=None):
+    """ Compiles source of program (unicode or utf-8 str), returns CompileResult """
+    if options is None:
+        options = CompileOptions()
+    if isinstance(source, str):
+        source = source.decode('utf8')
+
+    result = CompileResult()
+    errors = error_processor.Errors()
+    if options.profile:
+        result.profile = profile = ll_profile.Profile()
+    else:
+        profile = ll_profile.NullProfile()
+
+    # Run lexer
+    with profile.phase('lex'):
+        lexer = ListLangLexer.ListLangLexer(antlr3.ANTLRStringStream(source))
+        lexer.errors = errors
+        tokens = antlr3.CommonTokenStream(lexer)
+        tokens.fillBuffer()
+    profile.count('tokens', len(tokens.getTokens()))
+    if options.keep_tokens:
+        result.tokens = tokens.getTokens()
+
+    # Get AST tree
+    with profile.phase('parse'):
+        parser = ListLangParser.ListLangParser(tokens)
+        parser.errors = errors
+        ast = parser.program().tree
+
+    result.errors = errors.get_all_errors()
+    if result.errors:
+        return result
+    if result.profile:
+        profile.count('ast_nodes', ll_profile.count_tree_nodes(ast))
+
+    with profile.phase('walk'):
+        nodes = antlr3.tree.CommonTreeNodeStream(ast)
+        nodes.setTokenStream(tokens)
+
+        walker = ListLangWalker.ListLangWalker(nodes)
+        walker.translator = jtrans.JTranslator(
+            opt_level=options.opt_level, tail_calls=options.tail_calls, profile=result.profile,
+            instrument=options.instrument
+        )
+
+        try:
+            result.jasmin_code = walker.program()
+        except error_processor.SemanticException as e:
+            errors.add_error(error_processor.SEMANTIC, e.line, e.pos_in_line, e.message)
+
+    result.errors = errors.get_all_errors()
+    if result.errors or not result.jasmin_code:
+        return result
+    if result.profile:
+        profile.count('instructions', count_instructions(result.jasmin_code))
+
+    if options.assemble:
+        with profile.phase('assemble'):
+            result.class_name, result.class_bytes = jclassfile.assemble(result.jasmin_code)
+        profile.count('class_bytes', len(result.class_bytes))
+    return result
@@ -0,0 +1,94 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+""" Profile of one compile: wall time, CPU time and process peak memory of phases and counters of compiled program
+
+Phases may be nested (make_class is a part of walk), nested phase is listed before its outer one.
+Memory is peak resident set size of process so far, taken after phase (ru_maxrss of resource module, not
+available on Windows). It isn't memory of the phase: it grows only when the phase goes over peak of everything
+before it in the process, including earlier compiles of batch job or compile server.
+"""
+
+import os
+import sys
+import time
+import contextlib
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+
+def peak_rss_kb():
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if sys.platform == 'darwin':
+        peak //= 1024    # bytes on Mac OS, kilobytes on Linux
+    return peak
+
+
+def cpu_time():
+    user_time, system_time = os.times()[:2]
+    return user_time + system_time
+
+
+class Profile:
+
+    def __init__(self):
+        self.phases = []    # [{'name', 'wall_time', 'cpu_time', 'peak_rss_kb'}] in order of phases end
+        self.counters = {}
+
+    @contextlib.contextmanager
+    def phase(self, name):
+        start_wall_time = time.time()
+        start_cpu_time = cpu_time()
+        try:
+            yield
+        finally:
+            self.phases.append({
+                'name': name,
+                'wall_time': time.time() - start_wall_time,
+                'cpu_time': cpu_time() - start_cpu_time,
+                'peak_rss_kb': peak_rss_kb(),
+            })
+
+    def count(self, name, value):
+        self.counters[name] = value
+
+    def as_dict(self):
+        return {'phases': self.phases, 'counters': self.counters}
+
+    def format_table(self):
+        lines = ['%-16s %10s %10s %30s' % ('phase', 'wall, s', 'cpu, s', 'process peak RSS so far, KB')]
+        for phase in self.phases:
+            peak = phase['peak_rss_kb']
+            lines.append('%-16s %10.4f %10.4f %30s' % (
+                phase['name'], phase['wall_time'], phase['cpu_time'], '-' if peak is None else peak
+            ))
+        lines.append('')
+        for name in sorted(self.counters):
+            lines.append('%-16s %10i' % (name, self.counters[name]))
+        return '\n'.join(lines)
+
+
+class NullProfile:
+    """ Profile which records nothing, used when profiling is off """
+
+    @contextlib.contextmanager
+    def phase(self, name):
+        yield
+
+    def count(self, name, value):
+        pass
+
+
+def count_tree_nodes(tree):
+    """ Number of nodes of ANTLR tree """
+    number = 0
+    stack = [tree]
+    while stack:
+        node = stack.pop()
+        number += 1
+        stack.extend(node.getChild(i) for i in xrange(node.getChildCount()))
+    return number
@@ -0,0 +1,46 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+""" Messages of compile server (listlang.py --serve) and its client (llclient.py)
+
+Message is JSON header and binary payload, both prefixed with 4 byte big-endian length. Request header has
+compile options, payload is source. Response header has status ("ok" or "error"), errors and tokens text,
+payload is jar file. This module must not import compiler modules, client imports it.
+"""
+
+import json
+import struct
+
+
+DEFAULT_SOCKET_PATH = 'tmp/listlang.sock'
+
+LENGTH_FORMAT = '>I'
+LENGTH_SIZE = struct.calcsize(LENGTH_FORMAT)
+
+
+class ProtocolError(Exception):
+    pass
+
+
+def receive_exactly(sock, size):
+    chunks = []
+    while size > 0:
+        chunk = sock.recv(min(size, 65536))
+        if not chunk:
+            raise ProtocolError('connection closed')
+        chunks.append(chunk)
+        size -= len(chunk)
+    return ''.join(chunks)
+
+
+def send_message(sock, header, payload=''):
+    header_json = json.dumps(header)
+    sock.sendall(struct.pack(LENGTH_FORMAT, len(header_json)) + header_json +
+                 struct.pack(LENGTH_FORMAT, len(payload)) + payload)
+
+
+def receive_message(sock):
+    """ Returns (header, payload) """
+    header_size, = struct.unpack(LENGTH_FORMAT, receive_exactly(sock, LENGTH_SIZE))
+    header = json.loads(receive_exactly(sock, header_size))
+    payload_size, = struct.unpack(LENGTH_FORMAT, receive_exactly(sock, LENGTH_SIZE))
+    return header, receive_exactly(sock, payload_size)
@@ -7,23 +7,28 @@ import jcodemaker
 
 class Scope:
 
-    total_scopes_number = 0
-
     def __init__(self, scope_name='main', global_scope=None):
         """ global_scope - scope that global for this scope, None if this scope is global """
 
-        self.scope_number = self.total_scopes_number
-        Scope.total_scopes_number += 1
+        # scopes are numbered by global scope, so numbers of every compile are independent
+        if global_scope:
+            self.scope_number = global_scope.scopes_number
+            global_scope.scopes_number += 1
+        else:
+            self.scope_number = 0
+            self.scopes_number = 1
 
         self.scope_name = scope_name
 
         self.vars = []
+        self.var_numbers = {}    # dict {var_id: index in vars}, vars of big functions are looked up often
         self.var_types = {}      # dict {var_id: var_type}
+        self.free_hidden_vars = {}   # {var_type: [numbers of hidden variables which code made later may take]}
         self.funcs = {}     # {function_id: (function_type, function_params_types, function_scope, ...)}
         self.code_maker = jcodemaker.JCodeMaker()
         if global_scope:
             self.global_scope = global_scope
-            self.global_vars = []
+            self.global_vars = set()
         else:
             self.global_scope = self
             self.global_vars = None
@@ -37,11 +42,12 @@ class Scope:
         self.funcs[f_id] = (None, f_params_types, f_scope)
 
     def add_var(self, var_id, var_type):
+        self.var_numbers[var_id] = len(self.vars)
         self.vars.append(var_id)
         self.var_types[var_id] = var_type
 
     def add_global_var(self, var_id):
-        self.global_vars.append(var_id)
+        self.global_vars.add(var_id)
 
     def get_function_code_name(self, name):
         return 's%i_%s' % (self.scope_number, name)
@@ -51,4 +57,4 @@ class Scope:
         self.funcs[functoin_id] = (return_type, function_params_types, function_scope)
 
     def contains_var(self, var_id):
-        return var_id in self.vars or (not self.is_global() and var_id in self.global_vars)
\ No newline at end of file
+        return var_id in self.var_numbers or (not self.is_global() and var_id in self.global_vars)
\ No newline at end of file
@@ -0,0 +1,133 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+""" Peephole optimizer of Jasmin command streams made by JCodeMaker
+
+Rule is function which gets list of parsed commands (see jframe.parse_command) of fixed size and returns
+list of replacing commands or None if it's not applicable. Rules are applied until none of them matches.
+New rules are added to RULES table.
+"""
+
+from jframe import parse_command
+
+
+def int_constant(instruction):
+    """ Returns value pushed by integer constant instruction or None """
+    opcode, operand = instruction
+    if opcode in ('ldc', 'bipush', 'sipush') and operand.lstrip('-').isdigit():
+        return int(operand)
+    if opcode == 'iconst_m1':
+        return -1
+    if opcode.startswith('iconst_'):
+        return int(opcode[-1])
+    return None
+
+
+def label_command(label):
+    """ Command of label in format of JCodeMaker.command_label """
+    return '\n%s:' % label
+
+
+def short_constant(instructions):
+    """ ldc N -> iconst_N / bipush N / sipush N """
+    opcode, operand = instructions[0]
+    if opcode != 'ldc':
+        return None
+    value = int_constant(instructions[0])
+    if value is None:
+        return None
+    if value == -1:
+        return ['iconst_m1']
+    if 0 <= value <= 5:
+        return ['iconst_%i' % value]
+    if -128 <= value <= 127:
+        return ['bipush %i' % value]
+    if -32768 <= value <= 32767:
+        return ['sipush %i' % value]
+    return None
+
+
+def dup_pop(instructions):
+    """ dup, pop -> nothing """
+    if [opcode for opcode, operand in instructions] == ['dup', 'pop']:
+        return []
+    return None
+
+
+def goto_next(instructions):
+    """ goto L, L: -> L: """
+    (opcode, target), (next_opcode, label) = instructions
+    if opcode == 'goto' and next_opcode == 'label' and target == label:
+        return [label_command(label)]
+    return None
+
+
+def increment(instructions):
+    """ iload X, ldc N, iadd, istore X -> iinc X N (isub -> iinc X -N) """
+    (load, load_operand), constant, (operation, _), (store, store_operand) = instructions
+    if load != 'iload' or store != 'istore' or load_operand != store_operand:
+        return None
+    value = int_constant(constant)
+    if value is None or operation not in ('iadd', 'isub'):
+        return None
+    if operation == 'isub':
+        value = -value
+    if not -128 <= value <= 127:
+        return None
+    return ['iinc %s %i' % (load_operand, value)]
+
+
+# [(window_size, rule)] in order of priority, each rule is applied to the whole code before the next one
+RULES = [
+    (4, increment),
+    (2, dup_pop),
+    (2, goto_next),
+    (1, short_constant),
+]
+
+
+def strip_comments(commands):
+    """ Removes comments and blank lines, so they don't split instruction sequences,
+    returns (commands, parsed commands) """
+    result = []
+    parsed = []
+    for command in commands:
+        parsed_command = parse_command(command)
+        if parsed_command is not None:
+            result.append(command)
+            parsed.append(parsed_command)
+    return result, parsed
+
+
+def apply_rule(commands, parsed, window_size, rule):
+    """ Returns (new_commands, new_parsed, changed), parsed - parsed commands, only replacements are parsed again """
+    result = []
+    result_parsed = []
+    changed = False
+    i = 0
+    while i < len(commands):
+        replacement = None
+        if i + window_size <= len(commands):
+            replacement = rule(parsed[i:i + window_size])
+        if replacement is None:
+            result.append(commands[i])
+            result_parsed.append(parsed[i])
+            i += 1
+        else:
+            result.extend(replacement)
+            result_parsed.extend(parse_command(command) for command in replacement)
+            i += window_size
+            changed = True
+    return result, result_parsed, changed
+
+
+def optimize(commands, rules=RULES):
+    """ Returns optimized copy of commands list """
+    commands, parsed = strip_comments(commands)
+
+    changed = True
+    while changed:
+        changed = False
+        for window_size, rule in rules:
+            commands, parsed, rule_changed = apply_rule(commands, parsed, window_size, rule)
+            changed = changed or rule_changed
+    return commands